@@ -6,9 +6,11 @@
 
 from Kqlmagic.constants import Constants
 from Kqlmagic.kql_client import KqlResponse, KqlSchemaResponse
+from Kqlmagic.kql_proxy import KqlTableResponse
 import hashlib
 import json
 import os
+import numpy
 
 
 class CacheClient(object):
@@ -46,7 +48,7 @@ class CacheClient(object):
         if query string ends with the '.json' extension it returns the string
         otherwise it computes it from the query
         """
-        file_name = query if query.strip().endswith('.json') else self._get_query_hash_filename(query)
+        file_name = query if query.strip().endswith('.json') or query.strip().endswith('.parquet') else self._get_query_hash_filename(query)
         database_name, cluster_name = database_at_cluster.split('_at_')
         folder_path = self._get_folder_path(database_name, cluster_name)
         filen_path = folder_path + '/' + file_name
@@ -79,6 +81,8 @@ class CacheClient(object):
         :param str query: Query to be executed.
         """
         file_path = self._get_file_path(query, database_at_cluster)
+        if file_path.endswith('.parquet'):
+            return KqlResponse(self._read_parquet(file_path), "v2")
         str_response = open(file_path, 'r').read()
         json_response = json.loads(str_response)
         if query.startswith('.') and json_response.get('tables') is not None:
@@ -94,9 +98,86 @@ class CacheClient(object):
         """
         database_at_cluster = database + '_at_' + cluster
         file_path = filepath or self._get_file_path(query, database_at_cluster)
+        if file_path.endswith('.parquet'):
+            # parquet file holds a single table, the primary result
+            return result.tables[0].to_parquet(file_path)
         outfile = open(file_path, "w")
         outfile.write(json.dumps(result.json_response))
         outfile.flush()
         outfile.close()
         return file_path
 
+
+    def _read_parquet(self, file_path):
+        """ Reads parquet file as a v2 json response with a single primary result table.
+        Columns types and visualization properties are taken from the file metadata if written by to_parquet,
+        otherwise columns types are derived from the arrow types
+        """
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(file_path)
+        metadata = table.schema.metadata or {}
+        kql_metadata = metadata.get(KqlTableResponse.PARQUET_METADATA_KEY)
+        if kql_metadata is not None:
+            kql_metadata = json.loads(kql_metadata.decode("utf-8"))
+            columns = kql_metadata.get("Columns")
+            visualization = kql_metadata.get("Visualization")
+        else:
+            columns = [{"ColumnName": field.name, "ColumnType": self._get_kql_type(pyarrow, field.type)} for field in table.schema]
+            visualization = None
+
+        values = [self._to_json_values(pyarrow, arrow_column) for arrow_column in table.columns]
+        rows = [list(row) for row in zip(*values)] if len(values) > 0 else []
+
+        frames = [{"FrameType": "DataTable", "TableId": 0, "TableKind": "PrimaryResult", "TableName": "PrimaryResult", "Columns": columns, "Rows": rows}]
+        if visualization:
+            frames.append({
+                "FrameType": "DataTable", "TableId": 1, "TableKind": "QueryProperties", "TableName": "@ExtendedProperties",
+                "Columns": [
+                    {"ColumnName": "TableId", "ColumnType": "int"},
+                    {"ColumnName": "Key", "ColumnType": "string"},
+                    {"ColumnName": "Value", "ColumnType": "dynamic"},
+                ],
+                "Rows": [[0, "Visualization", json.dumps(visualization)]],
+            })
+        return frames
+
+
+    @staticmethod
+    def _get_kql_type(pyarrow, arrow_type):
+        if pyarrow.types.is_boolean(arrow_type):
+            return "bool"
+        elif pyarrow.types.is_integer(arrow_type):
+            return "long"
+        elif pyarrow.types.is_floating(arrow_type):
+            return "real"
+        elif pyarrow.types.is_timestamp(arrow_type):
+            return "datetime"
+        elif pyarrow.types.is_duration(arrow_type):
+            return "timespan"
+        return "string"
+
+
+    @staticmethod
+    def _to_json_values(pyarrow, arrow_column):
+        """ Returns the column values as they are in kusto json response """
+        if pyarrow.types.is_timestamp(arrow_column.type):
+            datetimes = arrow_column.cast(pyarrow.timestamp("ns")).to_numpy(zero_copy_only=False)
+            strings = numpy.datetime_as_string(datetimes, unit="ns").tolist()
+            return [None if s == "NaT" else s + "Z" for s in strings]
+        elif pyarrow.types.is_duration(arrow_column.type):
+            ns = arrow_column.cast(pyarrow.duration("ns")).cast(pyarrow.int64()).to_pylist()
+            return [None if v is None else CacheClient._to_timespan_string(v) for v in ns]
+        elif pyarrow.types.is_dictionary(arrow_column.type):
+            return arrow_column.cast(arrow_column.type.value_type).to_pylist()
+        return arrow_column.to_pylist()
+
+
+    @staticmethod
+    def _to_timespan_string(ns):
+        ticks = abs(ns) // 100
+        seconds, fraction = divmod(ticks, 10 ** 7)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        days, hours = divmod(hours, 24)
+        return "{0}{1}{2:02d}:{3:02d}:{4:02d}.{5:07d}".format("-" if ns < 0 else "", "{0}.".format(days) if days else "", hours, minutes, seconds, fraction)
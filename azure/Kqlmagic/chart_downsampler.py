@@ -0,0 +1,82 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+from datetime import datetime
+import numpy
+
+
+class Chart_downsampler(object):
+    """
+    Reduces the points of a chart series to a points budget, before the series is passed to the figure.
+    lttb (largest triangle three buckets) keeps the visual shape of the series,
+    minmax keeps the minimum and the maximum of each bucket, so that peaks are never lost.
+    """
+
+    LTTB = "lttb"
+    MIN_MAX = "minmax"
+    MODES = [LTTB, MIN_MAX]
+
+    @staticmethod
+    def downsample(xs, ys, points_budget, mode=LTTB):
+        "returns (xs, ys, downsampled). Points with null x or y are dropped if the series is downsampled"
+        if not points_budget or len(xs) <= points_budget:
+            return xs, ys, False
+        points = [(x, y) for x, y in zip(xs, ys) if y is not None and x is not None]
+        if len(points) <= points_budget:
+            # only null points exceed the budget
+            return xs, ys, False
+        x_values = Chart_downsampler._to_numeric([p[0] for p in points])
+        y_values = numpy.array([p[1] for p in points], dtype=float)
+        if mode == Chart_downsampler.MIN_MAX:
+            indexes = Chart_downsampler._min_max(y_values, points_budget)
+        else:
+            indexes = Chart_downsampler._lttb(x_values, y_values, points_budget)
+        return [points[idx][0] for idx in indexes], [points[idx][1] for idx in indexes], True
+
+    @staticmethod
+    def _to_numeric(xs):
+        "returns x values as float array, datetime as timestamp, and position if x values are not numeric"
+        try:
+            if isinstance(xs[0], datetime):
+                return numpy.array([x.timestamp() for x in xs], dtype=float)
+            return numpy.array(xs, dtype=float)
+        except (TypeError, ValueError):
+            return numpy.arange(len(xs), dtype=float)
+
+    @staticmethod
+    def _lttb(x, y, threshold):
+        "returns indexes of the selected points, first and last points are always selected"
+        threshold = max(threshold, 3)
+        n = len(x)
+        every = (n - 2) / (threshold - 2)
+        indexes = numpy.empty(threshold, dtype=int)
+        indexes[0] = 0
+        indexes[-1] = n - 1
+        a = 0
+        for i in range(threshold - 2):
+            start = int(i * every) + 1
+            end = int((i + 1) * every) + 1
+            next_end = min(int((i + 2) * every) + 1, n)
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+            # area of the triangles formed by the previous selected point, the bucket points and the next bucket average
+            areas = numpy.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+            a = start + int(areas.argmax())
+            indexes[i + 1] = a
+        return indexes
+
+    @staticmethod
+    def _min_max(y, threshold):
+        "returns indexes of the min and max points of each bucket, in order"
+        n = len(y)
+        buckets_count = max(threshold // 2, 1)
+        edges = numpy.linspace(0, n, buckets_count + 1).astype(int)
+        indexes = []
+        for start, end in zip(edges[:-1], edges[1:]):
+            if end > start:
+                bucket = y[start:end]
+                indexes.extend(sorted({start + int(bucket.argmin()), start + int(bucket.argmax())}))
+        return indexes
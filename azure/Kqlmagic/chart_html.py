@@ -0,0 +1,96 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import uuid
+import json
+import base64
+import calendar
+import numbers
+from datetime import datetime
+import numpy
+import plotly
+from Kqlmagic.display import Display
+
+
+class Chart_html(object):
+    """
+    Renders a plotly figure as html for a popup window.
+    Numeric x and y arrays, and datetime arrays of date axes, are written as base64 float64 arrays, that are decoded
+    to typed arrays in the window. plotly.js is loaded from the cdn, or from a single file in the popup files folder.
+    """
+
+    PLOTLYJS_CDN_URL = "https://cdn.plot.ly/plotly-latest.min.js"
+
+    @staticmethod
+    def to_html(figure, include_plotlyjs=False):
+        "returns head and body of the popup window html"
+        figure_json = figure.to_plotly_json()
+        data = [Chart_html._encode_trace(trace, figure_json.get("layout", {})) for trace in figure_json.get("data", [])]
+        if include_plotlyjs:
+            src = Display._get_shared_file_path("plotly-{0}.min.js".format(plotly.__version__), plotly.offline.get_plotlyjs)
+        else:
+            src = Chart_html.PLOTLYJS_CDN_URL
+        head = '<script src="{0}"></script>'.format(src)
+        div_id = uuid.uuid4().hex
+        body = """<div id="{div_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>
+        <script>
+        (function() {{
+            function decode(value) {{
+                var bytes = atob(value.bdata);
+                var buffer = new ArrayBuffer(bytes.length);
+                var view = new Uint8Array(buffer);
+                for (var i = 0; i < bytes.length; i++) {{
+                    view[i] = bytes.charCodeAt(i);
+                }}
+                return new Float64Array(buffer);
+            }}
+            var data = {data};
+            data.forEach(function(trace) {{
+                ["x", "y"].forEach(function(key) {{
+                    if (trace[key] && trace[key].dtype === "f8" && trace[key].bdata !== undefined) {{
+                        trace[key] = decode(trace[key]);
+                    }}
+                }});
+            }});
+            Plotly.newPlot("{div_id}", data, {layout}, {{"responsive": true}});
+        }})();
+        </script>""".format(
+            div_id=div_id,
+            data=json.dumps(data, cls=plotly.utils.PlotlyJSONEncoder),
+            layout=json.dumps(figure_json.get("layout", {}), cls=plotly.utils.PlotlyJSONEncoder),
+        )
+        return {"body": body, "head": head}
+
+    @staticmethod
+    def _encode_trace(trace, layout):
+        trace = dict(trace)
+        for key in ("x", "y"):
+            values = trace.get(key)
+            if isinstance(values, (list, tuple, numpy.ndarray)) and len(values) > 0:
+                axis_name = key + "axis" + trace.get(key + "axis", key)[1:]
+                is_date_axis = layout.get(axis_name, {}).get("type") == "date"
+                encoded = Chart_html._encode_values(values, is_date_axis)
+                if encoded is not None:
+                    trace[key] = encoded
+        return trace
+
+    @staticmethod
+    def _encode_values(values, is_date_axis):
+        "returns values as base64 float64 array, datetime as milliseconds since epoch, or None if values can't be encoded"
+        numeric = []
+        for value in values:
+            if value is None:
+                numeric.append(numpy.nan)
+            elif isinstance(value, datetime):
+                if not is_date_axis:
+                    return None
+                numeric.append(calendar.timegm(value.utctimetuple()) * 1000.0 + value.microsecond / 1000.0)
+            elif isinstance(value, numbers.Real) and not isinstance(value, bool):
+                numeric.append(value)
+            else:
+                return None
+        bdata = base64.b64encode(numpy.array(numeric, dtype="<f8").tobytes()).decode("ascii")
+        return {"dtype": "f8", "bdata": bdata}
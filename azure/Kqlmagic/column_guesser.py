@@ -80,40 +80,51 @@ class ColumnGuesserMixin(object):
         quantity_columns = [c for idx,c in enumerate(self.columns) if idx != x_col_idx and c.is_quantity]
         non_quantity_columns = [c for idx,c in enumerate(self.columns) if idx != x_col_idx and not c.is_quantity]
 
-        rows = self
+        # rows values are decoded once
+        rows = list(self._decode_rows())
         if self.columns[x_col_idx].is_quantity:
-            rows = sorted(self, key=lambda row: row[x_col_idx])
+            rows.sort(key=lambda row: row[x_col_idx])
 
         col_x = Column(col=self.columns[x_col_idx])
-        for row in rows:
-            if row[x_col_idx] not in col_x:
-                col_x.append(row[x_col_idx])
-
+        try:
+            # distinct x values, in order of first appearance
+            col_x.extend(dict.fromkeys(row[x_col_idx] for row in rows))
+        except TypeError:
+            # unhashable values
+            for row in rows:
+                if row[x_col_idx] not in col_x:
+                    col_x.append(row[x_col_idx])
+
+        # sub tables by (split values, quantity column), the split values name is computed once per row
         chart_sub_tables_dict = {}
+        chart_sub_tables_by_key = {}
         for row in rows:
+            split_name = ':'.join([row[col.idx] for col in non_quantity_columns]) + ':' if len(non_quantity_columns) > 0 else ''
+            x = row[x_col_idx]
             for qcol in quantity_columns:
-                if len(non_quantity_columns) > 0:
-                    sub_table_name = ':'.join([row[col.idx] for col in non_quantity_columns]) + ':' + qcol.name
-                else:
-                    sub_table_name =  qcol.name
-                chart_sub_table = chart_sub_tables_dict.get(sub_table_name)
+                key = (split_name, qcol.idx)
+                chart_sub_table = chart_sub_tables_by_key.get(key)
                 if chart_sub_table is None:
-                    chart_sub_table = chart_sub_tables_dict[sub_table_name] = ChartSubTable(
-                        name=sub_table_name, 
-                        col_x=Column(col=self.columns[x_col_idx]), 
-                        col_y=Column(col=qcol),
-                        mapping=dict(zip(col_x, [None for i in range(len(col_x))])))
-                chart_sub_table[row[x_col_idx]] = row[qcol.idx]
+                    sub_table_name = split_name + qcol.name
+                    chart_sub_table = chart_sub_tables_dict.get(sub_table_name)
+                    if chart_sub_table is None:
+                        chart_sub_table = chart_sub_tables_dict[sub_table_name] = ChartSubTable(
+                            name=sub_table_name, 
+                            col_x=Column(col=self.columns[x_col_idx]), 
+                            col_y=Column(col=qcol),
+                            mapping=dict.fromkeys(col_x))
+                    chart_sub_tables_by_key[key] = chart_sub_table
+                chart_sub_table[x] = row[qcol.idx]
         self.chart_sub_tables = list(chart_sub_tables_dict.values())
 
     def _build_columns(self, name=None, without_data=False):
         self.x = Column()
         self.ys = []
 
-        rows = self
+        rows = self._decode_rows()
         if name:
             idx = self.columns_name.index(name)
-            rows = sorted(self, key=lambda row: row[idx])  # sort by index
+            rows = sorted(rows, key=lambda row: row[idx])  # sort by index
 
         self.columns = [Column(idx, name) for (idx, name) in enumerate(self.columns_name)]
         if len(self.columns_datafarme_type) > 0:
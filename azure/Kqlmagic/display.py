@@ -4,6 +4,7 @@
 # license information.
 #--------------------------------------------------------------------------
 
+import os
 import uuid
 from IPython.core.display import display, HTML
 from IPython.display import JSON
@@ -123,6 +124,16 @@ class Display(object):
         file_path = Display.showfiles_folder_name + "/" + file_name + ".html"
         return file_path
 
+    @staticmethod
+    def _get_shared_file_path(file_name, get_content):
+        "writes content to a file in the show files folder, once, returns the file path relative to the show files"
+        full_file_name = Display.showfiles_base_path + "/" + Display.showfiles_folder_name + "/" + file_name
+        if not os.path.exists(full_file_name):
+            text_file = open(full_file_name, "w", encoding="utf-8")
+            text_file.write(get_content())
+            text_file.close()
+        return file_name
+
     @staticmethod
     def _get_name(**kwargs):
         if kwargs is not None and isinstance(kwargs.get("file_name"), str) and len(kwargs.get("file_name")) > 0:
@@ -5,39 +5,175 @@
 #--------------------------------------------------------------------------
 
 import six
+import copy
 from datetime import timedelta, datetime
 import re
 import json
 import adal
 import dateutil.parser
+import dateutil.tz
 import requests
+import numpy
+
+# Regex for TimeSpan, [-][d.]hh:mm:ss[.fffffff]
+# multiline, to match all the values of a column joined by newlines at once
+_TIMESPAN_PATTERN = re.compile(r"^(-?)(?:([0-9]+)\.)?([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]+))?$", re.MULTILINE)
+
+# Number of nanoseconds in a TimeSpan tick
+_NANOSECONDS_PER_TICK = 100
+
+# Whole seconds below the timedelta64[ns] limit (int64 nanoseconds), larger timespans are kept as timedelta objects
+_TIMEDELTA64_MAX_SECONDS = (2 ** 63 - 1) // 10 ** 9 - 1
+
+# Kusto data types that the columnar decoder stores in typed numpy arrays, all other types are stored in object arrays
+_KQL_TO_NUMPY_DATA_TYPES = {
+    "bool": "bool",
+    "uint8": "int64",
+    "int16": "int64",
+    "uint16": "int64",
+    "int": "int64",
+    "uint": "int64",
+    "long": "int64",
+    "ulong": "uint64",
+    "float": "float64",
+    "real": "float64",
+    "decimal": "float64",
+    "datetime": "datetime64[ns]",
+    "timespan": "timedelta64[ns]",
+    # Support V1
+    "Boolean": "bool",
+    "Int32": "int64",
+    "Int64": "int64",
+    "Double": "float64",
+    "DateTime": "datetime64[ns]",
+    "TimeSpan": "timedelta64[ns]",
+}
+
+# Regex for the fixed DateTime format emitted by Kusto, YYYY-MM-DDTHH:MM:SS[.fffffff]Z
+_DATETIME_PATTERN = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{1,9}))?Z$")
+
+# Range of years that can be represented by datetime64[ns]
+_DATETIME64_MIN_YEAR = "1678"
+_DATETIME64_MAX_YEAR = "2261"
+
+_UTC = dateutil.tz.tzutc()
+
+# Marks a KqlResult cell that was not converted yet
+_NOT_CONVERTED = object()
+
+_DICTIONARY_ENCODING_TYPES = frozenset(["string", "String"])
+
+
+class KqlResultSchema(object):
+    """ Schema shared by all the KqlResult rows of a table.
+
+    The row decoder is compiled once per schema: a tuple with the converter of each column (None for columns used as is),
+    and the (index, converter) pairs of the columns that require conversion. """
+
+    __slots__ = ("index2column_mapping", "index2type_mapping", "column2index_mapping", "converters_lambda_mappings", "converters", "converted_columns")
+
+    def __init__(self, index2column_mapping, index2type_mapping, converters_lambda_mappings):
+        self.index2column_mapping = index2column_mapping
+        self.index2type_mapping = index2type_mapping
+        self.converters_lambda_mappings = converters_lambda_mappings
+        self.column2index_mapping = dict((c, idx) for (idx, c) in enumerate(index2column_mapping))
+        self.converters = tuple(converters_lambda_mappings.get(t) for t in index2type_mapping)
+        self.converted_columns = tuple((idx, c) for (idx, c) in enumerate(self.converters) if c is not None)
+
+    def decode(self, row):
+        """ Returns list of the row values, converted """
+        values = list(row)
+        for (idx, converter) in self.converted_columns:
+            value = values[idx]
+            if value is not None:
+                values[idx] = converter(value)
+        return values
 
-# Regex for TimeSpan
-_TIMESPAN_PATTERN = re.compile(r"(-?)((?P<d>[0-9]*).)?(?P<h>[0-9]{2}):(?P<m>[0-9]{2}):(?P<s>[0-9]{2}(\.[0-9]+)?$)")
+    def __getitem__(self, key):
+        return KqlResultSchema(self.index2column_mapping[key], self.index2type_mapping[key], self.converters_lambda_mappings)
 
-class KqlResult(dict):
-    """ Simple wrapper around dictionary, to enable both index and key access to rows in result """
+    def with_converters(self, converters_lambda_mappings):
+        """ Returns schema of the same columns, with the converters of the specified types replaced """
+        return KqlResultSchema(self.index2column_mapping, self.index2type_mapping, dict(self.converters_lambda_mappings, **converters_lambda_mappings))
 
-    def __init__(self, index2column_mapping, *args, **kwargs):
-        super(KqlResult, self).__init__(*args, **kwargs)
-        # TODO: this is not optimal, if client will not access all fields.
-        # In that case, we are having unnecessary perf hit to convert Timestamp, even if client don't use it.
-        # In this case, it would be better for KqlResult to extend list class. In this case,
-        # KqlResultIter.index2column_mapping should be reversed, e.g. column2index_mapping.
-        self.index2column_mapping = index2column_mapping
+
+class KqlResult(object):
+    """ Row in result, backed by the raw json row, enables both index and key access.
+
+    Values that require conversion (datetime, timespan, dynamic) are converted on first access, and memoized. """
+
+    __slots__ = ("_schema", "_row", "_converted")
+
+    def __init__(self, schema, row):
+        self._schema = schema
+        self._row = row
+        self._converted = None
+
+    @property
+    def index2column_mapping(self):
+        return self._schema.index2column_mapping
+
+    def _get_value(self, index):
+        value = self._row[index]
+        converter = self._schema.converters[index]
+        if converter is None or value is None:
+            return value
+        if self._converted is None:
+            self._converted = [_NOT_CONVERTED] * len(self._row)
+        converted = self._converted[index]
+        if converted is _NOT_CONVERTED:
+            converted = self._converted[index] = converter(value)
+        return converted
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            start = min(key.start or 0, len(self))
-            end = min(key.stop or len(self), len(self))
-            mapping = self.index2column_mapping[start:end]
-            dic = dict([(c, dict.__getitem__(self, c)) for c in mapping ])
-            return KqlResult(mapping, dic)
+            return KqlResult(self._schema[key], self._row[key])
         elif isinstance(key, six.integer_types):
-            val = dict.__getitem__(self, self.index2column_mapping[key])
+            if key < 0:
+                key += len(self._row)
+            if not 0 <= key < len(self._row):
+                raise IndexError("row index out of range")
+            return self._get_value(key)
         else:
-            val = dict.__getitem__(self, key)
-        return val
+            return self._get_value(self._schema.column2index_mapping[key])
+
+    def __len__(self):
+        return len(self._row)
+
+    def __iter__(self):
+        if not self._schema.converted_columns:
+            return iter(self._row)
+        values = list(self._row)
+        for (idx, converter) in self._schema.converted_columns:
+            values[idx] = self._get_value(idx)
+        return iter(values)
+
+    def __eq__(self, other):
+        if not hasattr(other, "__len__") or not hasattr(other, "__iter__"):
+            return NotImplemented
+        if len(other) != len(self._row):
+            return False
+        return all(v == o for (v, o) in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def keys(self):
+        return self.index2column_mapping
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(zip(self.index2column_mapping, self))
+
+    def get(self, key, default=None):
+        idx = self._schema.column2index_mapping.get(key)
+        return default if idx is None else self._get_value(idx)
+
+    def __repr__(self):
+        return list(self).__repr__()
 
 
 class KqlResponseTable(six.Iterator):
@@ -55,6 +191,9 @@ class KqlResponseTable(six.Iterator):
             self.index2type_mapping.append(ctype)
         self.row_index = 0
         self._rows_count = len(self.rows)
+        self._columnar = None
+        # dictionary encoded columns, column index to (distinct values, codes array) pair
+        self.dictionaries = {}
         # Here we keep converter functions for each type that we need to take special care (e.g. convert)
         self.converters_lambda_mappings = {
             "datetime": self.to_datetime,
@@ -63,10 +202,11 @@ class KqlResponseTable(six.Iterator):
             "TimeSpan": self.to_timedelta,
             "dynamic": self.to_object,
         }
+        self.schema = KqlResultSchema(self.index2column_mapping, self.index2type_mapping, self.converters_lambda_mappings)
 
     @staticmethod
     def to_object(value):
-        if value is None:
+        if value is None or value == "":
             return None
         return json.loads(value)
 
@@ -74,8 +214,48 @@ class KqlResponseTable(six.Iterator):
     def to_datetime(value):
         if value is None:
             return None
+        match = _DATETIME_PATTERN.match(value)
+        if match:
+            year, month, day, hour, minute, second, fraction = match.groups()
+            microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+            try:
+                return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), microsecond, _UTC)
+            except ValueError:
+                pass
         return dateutil.parser.parse(value)
 
+    @staticmethod
+    def _to_datetime64(value):
+        if value is None:
+            return numpy.datetime64("NaT")
+        if value[-1:] == "Z" and _DATETIME64_MIN_YEAR <= value[:4] <= _DATETIME64_MAX_YEAR:
+            try:
+                return numpy.datetime64(value[:-1], "ns")
+            except ValueError:
+                pass
+        dt = dateutil.parser.parse(value)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(_UTC).replace(tzinfo=None)
+        if not _DATETIME64_MIN_YEAR <= "{:04d}".format(dt.year) <= _DATETIME64_MAX_YEAR:
+            raise ValueError("DateTime value '{}' is out of datetime64[ns] range".format(value))
+        return numpy.datetime64(dt, "ns")
+
+    @staticmethod
+    def to_datetime_column(values):
+        """Converts a column of DateTime strings to a datetime64[ns] array.
+
+        Values in the Kusto format are converted at once by numpy, if the column has other values,
+        each value is converted separately, falling back to dateutil for values numpy can't parse."""
+        if all(v is None or (v[-1:] == "Z" and _DATETIME64_MIN_YEAR <= v[:4] <= _DATETIME64_MAX_YEAR) for v in values):
+            try:
+                return numpy.array([None if v is None else v[:-1] for v in values], dtype="datetime64[ns]")
+            except ValueError:
+                pass
+        column = numpy.empty(len(values), dtype="datetime64[ns]")
+        for (idx, value) in enumerate(values):
+            column[idx] = KqlResponseTable._to_datetime64(value)
+        return column
+
     @staticmethod
     def to_timedelta(value):
         """Converts a string to a timedelta."""
@@ -85,19 +265,52 @@ class KqlResponseTable(six.Iterator):
             return timedelta(microseconds=(float(value) / 10))
         match = _TIMESPAN_PATTERN.match(value)
         if match:
-            if match.group(1) == "-":
-                factor = -1
-            else:
-                factor = 1
-            return factor * timedelta(
-                days=int(match.group("d") or 0),
-                hours=int(match.group("h")),
-                minutes=int(match.group("m")),
-                seconds=float(match.group("s")),
+            sign, days, hours, minutes, seconds, fraction = match.groups()
+            delta = timedelta(
+                days=int(days or 0),
+                seconds=int(hours) * 3600 + int(minutes) * 60 + int(seconds),
+                microseconds=int(fraction[:6].ljust(6, "0")) if fraction else 0,
             )
+            return -delta if sign == "-" else delta
         else:
             raise ValueError("Timespan value '{}' cannot be decoded".format(value))
 
+    @staticmethod
+    def to_timedelta_column(values):
+        """Converts a column of TimeSpan values to a timedelta64[ns] array.
+
+        String values are matched by a single regex pass over the whole column, and the matched parts are combined by numpy.
+        Values given as integer ticks are converted separately."""
+        count = len(values)
+        others = [idx for (idx, v) in enumerate(values) if not isinstance(v, six.string_types)]
+        strings = values if len(others) == 0 else [v if isinstance(v, six.string_types) else "00:00:00" for v in values]
+        parts = _TIMESPAN_PATTERN.findall("\n".join(strings)) if count > 0 else []
+        if len(parts) != count:
+            bad_value = next(v for v in strings if not _TIMESPAN_PATTERN.match(v))
+            raise ValueError("Timespan value '{}' cannot be decoded".format(bad_value))
+
+        def _to_ints(strs):
+            # prefix with "0", for optional parts that are empty
+            return numpy.fromiter(map(int, map("0".__add__, strs)), dtype="int64", count=count)
+
+        def _to_lengths(strs):
+            return numpy.fromiter(map(len, strs), dtype="int64", count=count)
+
+        signs, days, hours, minutes, seconds, fractions = zip(*parts) if count > 0 else [()] * 6
+        seconds = ((_to_ints(days) * 24 + _to_ints(hours)) * 60 + _to_ints(minutes)) * 60 + _to_ints(seconds)
+        if count > 0 and seconds.max() > _TIMEDELTA64_MAX_SECONDS:
+            raise OverflowError("Timespan value '{}' is out of timedelta64[ns] range".format(strings[int(seconds.argmax())]))
+        # fraction is scaled to 7 digits (ticks), finer digits are truncated
+        fraction_lengths = _to_lengths(fractions)
+        ticks = _to_ints(fractions) * 10 ** numpy.clip(7 - fraction_lengths, 0, None) // 10 ** numpy.clip(fraction_lengths - 7, 0, None)
+        ticks += seconds * 10000000
+        ticks *= 1 - 2 * _to_lengths(signs)
+        column = (ticks * _NANOSECONDS_PER_TICK).view("timedelta64[ns]")
+        for idx in others:
+            value = values[idx]
+            column[idx] = numpy.timedelta64("NaT") if value is None else numpy.timedelta64(int(value) * _NANOSECONDS_PER_TICK, "ns")
+        return column
+
     def __iter__(self):
         self.row_index = 0
         return self
@@ -106,15 +319,8 @@ class KqlResponseTable(six.Iterator):
         if self.row_index >= self.rows_count:
             raise StopIteration
         row = self.rows[self.row_index]
-        result_dict = {}
-        for index, value in enumerate(row):
-            data_type = self.index2type_mapping[index]
-            if data_type in self.converters_lambda_mappings:
-                result_dict[self.index2column_mapping[index]] = self.converters_lambda_mappings[data_type](value)
-            else:
-                result_dict[self.index2column_mapping[index]] = value
         self.row_index = self.row_index + 1
-        return KqlResult(self.index2column_mapping, result_dict)
+        return KqlResult(self.schema, row)
 
     @property
     def columns_name(self):
@@ -132,6 +338,10 @@ class KqlResponseTable(six.Iterator):
     def columns_count(self):
         return len(self.columns)
 
+    def get_row(self, idx):
+        """ Returns row at idx """
+        return KqlResult(self.schema, self.rows[idx])
+
     def fetchall(self):
         """ Returns iterator to get rows from response """
         return self.__iter__()
@@ -140,6 +350,197 @@ class KqlResponseTable(six.Iterator):
         """ Returns iterator to get rows from response """
         return self.__iter__()
 
+    def replace_rows(self, rows):
+        """ Replaces the rows of the table, in place. Decodes built from the previous rows are dropped """
+        self.rows[:] = rows
+        self._rows_count = len(self.rows)
+        self._columnar = None
+        self.dictionaries = {}
+
+    def decode_rows(self, schema=None):
+        """ Returns iterator over the rows values, converted by the compiled row decoder of schema (the table schema by default) """
+        return six.moves.map((schema or self.schema).decode, self.rows)
+
+    def dictionary_encode(self, threshold):
+        """ Dictionary encodes string columns that have no more than threshold distinct values.
+        Cells of an encoded column are replaced by a shared instance of their value, and the codes are kept for the dataframe """
+        for (col_idx, col_type) in enumerate(self.index2type_mapping):
+            if col_type not in _DICTIONARY_ENCODING_TYPES or col_idx in self.dictionaries:
+                continue
+            codes_mapping = {None: -1}
+            values = []
+            codes = []
+            for row in self.rows:
+                value = row[col_idx]
+                code = codes_mapping.get(value)
+                if code is None:
+                    if len(values) >= threshold:
+                        break
+                    code = codes_mapping[value] = len(values)
+                    values.append(value)
+                codes.append(code)
+            else:
+                for (row, code) in zip(self.rows, codes):
+                    if code >= 0:
+                        row[col_idx] = values[code]
+                self.dictionaries[col_idx] = (values, numpy.array(codes, dtype="int32"))
+        self._columnar = None
+
+    def to_columnar(self, owned=False):
+        """ Returns the rows transposed into typed per column arrays. The transposition is done once, on first call.
+        If owned, the returned arrays are not shared with the cached transposition, and may be modified by the caller """
+        if owned:
+            return KqlColumnarTable(self) if self._columnar is None else self._columnar.copy()
+        if self._columnar is None:
+            self._columnar = KqlColumnarTable(self)
+        return self._columnar
+
+
+class KqlColumnarRow(object):
+    """ Lightweight view of a single row in a KqlColumnarTable, enables both index and key access """
+
+    __slots__ = ("table", "row_index")
+
+    def __init__(self, table, row_index):
+        self.table = table
+        self.row_index = row_index
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.table.get_value(self.row_index, idx) for idx in range(*key.indices(len(self)))]
+        elif isinstance(key, six.integer_types):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("row index out of range")
+            return self.table.get_value(self.row_index, key)
+        else:
+            return self.table.get_value(self.row_index, self.table.column2index_mapping[key])
+
+    def __len__(self):
+        return self.table.columns_count
+
+    def __iter__(self):
+        return (self.table.get_value(self.row_index, idx) for idx in range(self.table.columns_count))
+
+    def __repr__(self):
+        return list(self).__repr__()
+
+
+class KqlColumnarTable(object):
+    """ Columnar representation of a response table.
+
+    Rows are transposed once into per column arrays, numpy typed arrays for numeric, bool, datetime and timespan columns,
+    and object arrays for string, guid and dynamic columns. Row access is served by views over the columns. """
+
+    def __init__(self, response_table):
+        self.index2column_mapping = response_table.index2column_mapping
+        self.index2type_mapping = response_table.index2type_mapping
+        self.column2index_mapping = response_table.schema.column2index_mapping
+        self.rows_count = response_table.rows_count
+        self.columns_count = response_table.columns_count
+        transposed = list(zip(*response_table.rows)) if self.rows_count > 0 else [() for c in self.index2column_mapping]
+        self.columns = []
+        self._boxers = []
+        for (values, data_type, converter) in zip(transposed, self.index2type_mapping, response_table.schema.converters):
+            column, boxer = self._to_column(values, data_type, converter)
+            self.columns.append(column)
+            self._boxers.append(boxer)
+
+    @staticmethod
+    def _to_object_array(values):
+        array = numpy.empty(len(values), dtype=object)
+        try:
+            array[:] = values
+        except ValueError:
+            # values that are sequences of the same length are broadcast by numpy, assign them one by one
+            for idx, value in enumerate(values):
+                array[idx] = value
+        return array
+
+    @staticmethod
+    def _to_column(values, data_type, converter):
+        """ Returns a (column, boxer) pair, boxer converts a cell of the column back to a python value """
+        numpy_type = _KQL_TO_NUMPY_DATA_TYPES.get(data_type)
+        try:
+            if numpy_type == "datetime64[ns]":
+                return KqlResponseTable.to_datetime_column(values), _box_datetime
+            elif numpy_type == "timedelta64[ns]":
+                return KqlResponseTable.to_timedelta_column(values), _box_timedelta
+            elif numpy_type in ("int64", "uint64"):
+                if None in values:
+                    # numpy has no integer null, values are kept as integers and nulls are masked, and boxed back as None
+                    mask = numpy.fromiter((v is None for v in values), dtype="bool", count=len(values))
+                    data = numpy.array([0 if v is None else v for v in values], dtype=numpy_type)
+                    return numpy.ma.MaskedArray(data, mask=mask), _box_nullable_int
+                return numpy.array(values, dtype=numpy_type), _box_scalar
+            elif numpy_type == "float64":
+                return numpy.array(values, dtype="float64"), _box_scalar
+            elif numpy_type == "bool" and None not in values:
+                return numpy.array(values, dtype="bool"), _box_scalar
+        except (ValueError, TypeError, OverflowError):
+            # values that don't fit the numpy type (e.g. negative ulong or datetime before 1678), are kept as objects
+            pass
+        if converter is not None:
+            values = list(map(converter, values))
+        return KqlColumnarTable._to_object_array(values), _box_object
+
+    def copy(self):
+        """ Returns copy of the table, with copies of the column arrays """
+        table = copy.copy(self)
+        table.columns = [column.copy() for column in self.columns]
+        return table
+
+    def get_value(self, row_index, column_index):
+        return self._boxers[column_index](self.columns[column_index], row_index)
+
+    def get_column(self, key):
+        """ Returns column array by column name or index """
+        if isinstance(key, six.integer_types):
+            return self.columns[key]
+        return self.columns[self.column2index_mapping[key]]
+
+    def __len__(self):
+        return self.rows_count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [KqlColumnarRow(self, idx) for idx in range(*key.indices(self.rows_count))]
+        if key < 0:
+            key += self.rows_count
+        if key < 0 or key >= self.rows_count:
+            raise IndexError("row index out of range")
+        return KqlColumnarRow(self, key)
+
+    def __iter__(self):
+        return (KqlColumnarRow(self, idx) for idx in range(self.rows_count))
+
+
+def _box_scalar(column, idx):
+    return column.item(idx)
+
+
+def _box_object(column, idx):
+    return column[idx]
+
+
+def _box_nullable_int(column, idx):
+    return None if column.mask[idx] else column.data.item(idx)
+
+
+def _box_datetime(column, idx):
+    value = column[idx]
+    if numpy.isnat(value):
+        return None
+    return value.astype("datetime64[us]").item().replace(tzinfo=_UTC)
+
+
+def _box_timedelta(column, idx):
+    value = column[idx]
+    if numpy.isnat(value):
+        return None
+    return value.astype("timedelta64[us]").item()
+
 class KqlSchemaResponse(object):
     def __init__(self, json_response):
         self.json_response = json_response
@@ -161,15 +562,37 @@ class KqlResponse(object):
         self.json_response = json_response
         self.endpoint_version = endpoint_version
         self.visualization = None
+        self._completion_query_info = None
+        self._completion_query_resource_consumption = None
+        # frames (tables) that hold the query properties and the completion information, classified once, at construction
+        self._query_properties_tables = []
+        self._query_completion_tables = []
         if self.endpoint_version == "v2":
-            self.all_tables = [t for t in json_response if t["FrameType"] == "DataTable"]
-            self.tables = [t for t in json_response if t["FrameType"] == "DataTable" and t["TableKind"] == "PrimaryResult"]
+            self.all_tables = []
+            self.tables = []
+            for frame in json_response:
+                if frame["FrameType"] == "DataTable":
+                    self.all_tables.append(frame)
+                    table_kind = frame["TableKind"]
+                    if table_kind == "PrimaryResult":
+                        self.tables.append(frame)
+                    elif table_kind == "QueryProperties" and frame["TableName"] == "@ExtendedProperties":
+                        self._query_properties_tables.append(frame)
+                    elif frame["TableName"] == "QueryCompletionInformation":
+                        self._query_completion_tables.append(frame)
             self.primary_results = [KqlResponseTable(t["TableId"], t) for t in self.tables]
         else:
             self.all_tables = self.json_response["Tables"]
             tables_num = self.json_response["Tables"].__len__()
             last_table = self.json_response["Tables"][tables_num - 1]
-            self.tables = [self.json_response["Tables"][r[0]] for r in last_table["Rows"] if r[2] == "GenericResult" or r[2] == "PrimaryResult"]
+            self.tables = []
+            for r in last_table["Rows"]:
+                if r[2] == "GenericResult" or r[2] == "PrimaryResult":
+                    self.tables.append(self.all_tables[r[0]])
+                elif r[2] == "@ExtendedProperties" and r[1] == "QueryProperties":
+                    self._query_properties_tables.append(self.all_tables[r[0]])
+                elif r[2] == "QueryStatus":
+                    self._query_completion_tables.append(self.all_tables[r[0]])
             if len(self.tables) == 0:
                 self.tables = self.all_tables[:1]
             self.primary_results = [KqlResponseTable(idx, t) for idx,t in enumerate(self.tables)]
@@ -187,84 +610,72 @@ class KqlResponse(object):
         if self.visualization is None:
             self.visualization = {}
             if self.endpoint_version == "v2":
-                for table in self.all_tables:
-                    if table["TableName"] == "@ExtendedProperties" and table["TableKind"] == "QueryProperties":
-                        cols_idx_map = self._map_columns_to_index(table["Columns"])
-                        types = self._get_columns_types(table["Columns"])
-                        key_idx = cols_idx_map.get('Key')
-                        id_idx = cols_idx_map.get('TableId')
-                        value_idx = cols_idx_map.get('Value')
-                        if (key_idx is not None and 
-                            id_idx is not None and 
-                            value_idx is not None and 
-                            types[key_idx] == "string" and 
-                            types[id_idx] == "int" and 
-                            types[value_idx] == "dynamic"):
-                            for row in table["Rows"]:
-                                if row[key_idx] == "Visualization":
-                                    # print('visualization_properties for table {0}: {1}'.format(id_idx, row[value_idx]))
-                                    self.visualization[row[id_idx]] = json.loads(row[value_idx])
-                                    # return json.loads(row[value_idx])
+                for table in self._query_properties_tables:
+                    cols_idx_map = self._map_columns_to_index(table["Columns"])
+                    types = self._get_columns_types(table["Columns"])
+                    key_idx = cols_idx_map.get('Key')
+                    id_idx = cols_idx_map.get('TableId')
+                    value_idx = cols_idx_map.get('Value')
+                    if (key_idx is not None and 
+                        id_idx is not None and 
+                        value_idx is not None and 
+                        types[key_idx] == "string" and 
+                        types[id_idx] == "int" and 
+                        types[value_idx] == "dynamic"):
+                        for row in table["Rows"]:
+                            if row[key_idx] == "Visualization":
+                                # print('visualization_properties for table {0}: {1}'.format(id_idx, row[value_idx]))
+                                self.visualization[row[id_idx]] = json.loads(row[value_idx])
             else:
-                tables_num = self.json_response["Tables"].__len__()
-                last_table = self.json_response["Tables"][tables_num - 1]
-                for row in last_table["Rows"]:
-                    if row[2] == "@ExtendedProperties" and row[1] == "QueryProperties":
-                        table = self.json_response["Tables"][row[0]]
-                        # print('visualization_properties for first table: {}'.format(table['Rows'][0][0]))
-                        self.visualization[0] = json.loads(table["Rows"][0][0])
-                        # return json.loads(table["Rows"][0][0])
+                for table in self._query_properties_tables:
+                    # print('visualization_properties for first table: {}'.format(table['Rows'][0][0]))
+                    self.visualization[0] = json.loads(table["Rows"][0][0])
         return self.visualization
 
-    @property
-    def completion_query_info_results(self):
+    def _get_completion_rows(self, event_type_name):
+        """ returns the rows of the completion information tables of the specified event type """
         if self.endpoint_version == "v2":
-            for table in self.all_tables:
-                if table["TableName"] == "QueryCompletionInformation":
-                    cols_idx_map = self._map_columns_to_index(table["Columns"])
-                    event_type_name_idx = cols_idx_map.get("EventTypeName")
-                    payload_idx = cols_idx_map.get("Payload")
-                    if event_type_name_idx is not None and payload_idx is not None:
-                        for row in table["Rows"]:
-                            if row[event_type_name_idx] == "QueryInfo":
-                                return json.loads(row[payload_idx])
+            for table in self._query_completion_tables:
+                cols_idx_map = self._map_columns_to_index(table["Columns"])
+                event_type_name_idx = cols_idx_map.get("EventTypeName")
+                payload_idx = cols_idx_map.get("Payload")
+                if event_type_name_idx is not None and payload_idx is not None:
+                    for row in table["Rows"]:
+                        if row[event_type_name_idx] == event_type_name:
+                            yield row[payload_idx]
         else:
-            tables_num = self.json_response["Tables"].__len__()
-            last_table = self.json_response["Tables"][tables_num - 1]
-            for r in last_table["Rows"]:
-                if r[2] == "QueryStatus":
-                    t = self.json_response["Tables"][r[0]]
-                    for sr in t["Rows"]:
-                        if sr[2] == "Info":
-                            info = {"StatusCode": sr[3], "StatusDescription": sr[4], "Count": sr[5]}
-                            # print('Info: {}'.format(info))
-                            return info
-        return {}
+            for table in self._query_completion_tables:
+                for row in table["Rows"]:
+                    if row[2] == event_type_name:
+                        yield row
+
+    @property
+    def completion_query_info_results(self):
+        if self._completion_query_info is None:
+            self._completion_query_info = {}
+            if self.endpoint_version == "v2":
+                for payload in self._get_completion_rows("QueryInfo"):
+                    self._completion_query_info = json.loads(payload)
+                    break
+            else:
+                for sr in self._get_completion_rows("Info"):
+                    self._completion_query_info = {"StatusCode": sr[3], "StatusDescription": sr[4], "Count": sr[5]}
+                    break
+        return self._completion_query_info
 
     @property
     def completion_query_resource_consumption_results(self):
-        if self.endpoint_version == "v2":
-            for table in self.all_tables:
-                if table["TableName"] == "QueryCompletionInformation":
-                    cols_idx_map = self._map_columns_to_index(table["Columns"])
-                    event_type_name_idx = cols_idx_map.get("EventTypeName")
-                    payload_idx = cols_idx_map.get("Payload")
-                    if event_type_name_idx is not None and payload_idx is not None:
-                        for row in table["Rows"]:
-                            if row[event_type_name_idx] == "QueryResourceConsumption":
-                                return json.loads(row[payload_idx])
-        else:
-            tables_num = self.json_response["Tables"].__len__()
-            last_table = self.json_response["Tables"][tables_num - 1]
-            for r in last_table["Rows"]:
-                if r[2] == "QueryStatus":
-                    t = self.json_response["Tables"][r[0]]
-                    for sr in t["Rows"]:
-                        if sr[2] == "Stats":
-                            stats = sr[4]
-                            # print('stats: {}'.format(stats))
-                            return json.loads(stats)
-        return {}
+        if self._completion_query_resource_consumption is None:
+            self._completion_query_resource_consumption = {}
+            if self.endpoint_version == "v2":
+                for payload in self._get_completion_rows("QueryResourceConsumption"):
+                    self._completion_query_resource_consumption = json.loads(payload)
+                    break
+            else:
+                for sr in self._get_completion_rows("Stats"):
+                    self._completion_query_resource_consumption = json.loads(sr[4])
+                    break
+        return self._completion_query_resource_consumption
 
     def _map_columns_to_index(self, columns: list):
         map = {}
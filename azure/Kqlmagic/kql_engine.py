@@ -62,10 +62,19 @@ class KqlEngine(object):
 
     def execute(self, query, user_namespace=None, **kwargs):
         if query.strip():
+            auto_limit = kwargs.get("auto_limit")
+            if auto_limit is not None and auto_limit > 0:
+                # one record above the limit is requested, to know whether the result was truncated
+                query = self._limit_query_records(query, auto_limit + 1)
             response = self.client_execute(query, user_namespace, **kwargs)
             # print(response.json_response)
             return KqlResponse(response, **kwargs)
 
+    def _limit_query_records(self, query, max_records):
+        """ Returns the query, modified to limit the number of records returned by the service.
+        By default the limit is not pushed to the service, and the result is truncated by the client """
+        return query
+
     def validate(self, **kwargs):
         client = self.get_client()
         if not client:
@@ -63,6 +63,18 @@ class Kqlmagic(Magics, Configurable):
         help="Automatically limit the number of rows displayed (full result set is still stored). Abbreviation: dl",
     )
     auto_dataframe = Bool(False, config=True, help="Return Pandas dataframe instead of regular result sets. Abbreviation: ad")
+    keep_raw_json = Bool(
+        True,
+        config=True,
+        help="Keep the raw json response of the query in the result. If set to False, it is released once the response is decoded, "
+        "and raw_json is read back from the cache file, if the result was cached or saved as json. Abbreviation: krj",
+    )
+    dictionary_encoding_threshold = Int(
+        0,
+        config=True,
+        help="Dictionary encode string columns that have no more distinct values than the threshold. "
+        "Encoded columns are returned as pandas category, and rows share a single instance of each value. 0 disables encoding. Abbreviation: det",
+    )
     columns_to_local_vars = Bool(False, config=True, help="Return data into local variables from column names. Abbreviation: c2lv")
     feedback = Bool(True, config=True, help="Show number of records returned, and assigned variables. Abbreviation: f")
     show_conn_info = Enum(
@@ -81,8 +93,33 @@ class Kqlmagic(Magics, Configurable):
         "matching section in the DSN file. Abbreviation: dl",
     )
     plot_package = Enum(["matplotlib", "plotly"], "plotly", config=True, help="Set the plot package. Abbreviation: pp")
+    chart_points_budget = Int(
+        5000,
+        config=True,
+        help="Downsample timechart and linechart series with more points than the budget, the chart title indicates it. "
+        "The result set keeps all the data. 0 disables downsampling. Abbreviation: cpb",
+    )
+    chart_downsampling = Enum(
+        ["lttb", "minmax"],
+        "lttb",
+        config=True,
+        help="Set the downsampling method. lttb keeps the shape of the series, minmax keeps the min and max of each bucket. Abbreviation: cds",
+    )
+    chart_renderer = Enum(
+        ["auto", "svg", "webgl"],
+        "auto",
+        config=True,
+        help="Set the renderer of timechart, linechart and scatterchart traces. "
+        "auto renders with webgl charts that have more points than webgl_points_threshold, and with svg the others. Abbreviation: cr",
+    )
+    webgl_points_threshold = Int(
+        10000, config=True, help="Number of chart points above which auto chart_renderer renders with webgl. Abbreviation: wpt"
+    )
     table_package = Enum(
-        ["prettytable", "pandas", "plotly", "qgrid"], "prettytable", config=True, help="Set the table display package. Abbreviation: tp"
+        ["prettytable", "pandas", "plotly", "qgrid", "paged"],
+        "prettytable",
+        config=True,
+        help="Set the table display package. paged displays one page at a time, pages are fetched from the kernel on demand. Abbreviation: tp",
     )
     last_raw_result_var = Unicode(
         "_kql_raw_result_", config=True, help="Set the name of the variable that will contain last raw result. Abbreviation: var"
@@ -92,7 +129,7 @@ class Kqlmagic(Magics, Configurable):
     plotly_fs_includejs = Bool(
         False,
         config=True,
-        help="Include plotly javascript code in popup window. If set to False (default), it download the script from https://cdn.plot.ly/plotly-latest.min.js. Abbreviation: pfi",
+        help="Load plotly javascript code in popup window from a local file, shared by all popup windows. If set to False (default), it download the script from https://cdn.plot.ly/plotly-latest.min.js. Abbreviation: pfi",
     )
 
     validate_connection_string = Bool(
@@ -512,7 +549,8 @@ class Kqlmagic(Magics, Configurable):
             params_dict_name = options.get('params_dict')
             dictionary = user_ns.get(params_dict_name) if params_dict_name is not None and len(params_dict_name) > 0 else user_ns
             parametrized_query = Parameterizer(dictionary).expand(query) if result_set is None else result_set.parametrized_query
-            raw_query_result = conn.execute(parametrized_query, user_ns, **options)
+            incremental_query = result_set.fork_result(0)._get_incremental_query() if result_set is not None else None
+            raw_query_result = conn.execute(incremental_query or parametrized_query, user_ns, **options)
 
             end_time = time.time()
 
@@ -529,7 +567,13 @@ class Kqlmagic(Magics, Configurable):
                 fork_table_id = result_set.fork_table_id
                 saved_result = result_set.fork_result(0)
                 saved_result.feedback_info = []
-                saved_result._update(raw_query_result)
+                if incremental_query is not None and saved_result._merge_incremental_result(raw_query_result):
+                    raw_query_result = saved_result._queryResult
+                else:
+                    if incremental_query is not None:
+                        # the tail doesn't match the result, the whole query is executed
+                        raw_query_result = conn.execute(parametrized_query, user_ns, **options)
+                    saved_result._update(raw_query_result)
 
             result = saved_result
 
@@ -543,7 +587,7 @@ class Kqlmagic(Magics, Configurable):
 
             if options.get("feedback", self.feedback):
                 minutes, seconds = divmod(end_time - start_time, 60)
-                saved_result.feedback_info.append("Done ({:0>2}:{:06.3f}): {} records".format(int(minutes), seconds, saved_result.records_count))
+                saved_result.feedback_info.append("Done ({:0>2}:{:06.3f}): {} records{}".format(int(minutes), seconds, saved_result.records_count, " (truncated to auto_limit)" if saved_result.truncated else ""))
 
             if options.get("columns_to_local_vars", self.columns_to_local_vars):
                 # Instead of returning values, set variables directly in the
@@ -567,17 +611,37 @@ class Kqlmagic(Magics, Configurable):
                 self.shell.user_ns.update({result_var: result if result is not None else saved_result})
                 result = None
 
+            saved_result.metadata.pop("raw_json_file_path", None)
+            # after an incremental refresh of a result that released its raw json, there is no raw json of the whole result to save
+            raw_json_released = raw_query_result.json_response is None
             if options.get('cache') and not options.get('use_cache') and not isinstance(conn, CacheEngine):
-                file_path = CacheClient().save(raw_query_result, conn.get_database(), conn.get_cluster(), parametrized_query, **options)
-                if options.get("feedback", self.feedback):
-                    saved_result.feedback_info.append("query results cached")
+                if raw_json_released:
+                    if options.get("feedback", self.feedback):
+                        saved_result.feedback_info.append("query results not cached, raw json was released")
+                elif raw_query_result.truncated:
+                    # the cache key is the query, a truncated result would be read back as the whole result
+                    if options.get("feedback", self.feedback):
+                        saved_result.feedback_info.append("query results not cached, results were truncated to auto_limit")
+                else:
+                    file_path = CacheClient().save(raw_query_result, conn.get_database(), conn.get_cluster(), parametrized_query, **options)
+                    saved_result.metadata["raw_json_file_path"] = file_path
+                    if options.get("feedback", self.feedback):
+                        saved_result.feedback_info.append("query results cached")
 
-            if options.get('save_as') is not None:
+            if options.get('save_as') is not None and raw_json_released and not options.get('save_as').endswith('.parquet'):
+                if options.get("feedback", self.feedback):
+                    saved_result.feedback_info.append("query results not saved as {0}, raw json was released".format(options.get('save_as')))
+            elif options.get('save_as') is not None:
                 file_path = CacheClient().save(raw_query_result, conn.get_database(), conn.get_cluster(), parametrized_query, 
                                                filepath=options.get('save_as'), **options)
+                if file_path.endswith('.json'):
+                    saved_result.metadata["raw_json_file_path"] = file_path
                 if options.get("feedback", self.feedback):
                     saved_result.feedback_info.append("query results saved as {0}".format(file_path))
 
+            if not options.get("keep_raw_json", self.keep_raw_json):
+                saved_result._release_raw_json()
+
             saved_result.suppress_result = False
             saved_result.display_info = False
             if result is not None:
@@ -588,9 +652,7 @@ class Kqlmagic(Magics, Configurable):
                 else:
                     saved_result.display_info = True
 
-            if result_set is None:
-                saved_result._create_fork_results()
-            else:
+            if result_set is not None:
                 saved_result._update_fork_results()
 
             # Return results into the default ipython _ variable
@@ -6,15 +6,20 @@
 
 import six
 import json
+import numpy
+from Kqlmagic.constants import Constants
 from Kqlmagic.display import Display
 
 
 class KqlRow(six.Iterator):
+    """ Row in result set. Access returns the raw values, values are wrapped in styled classes only for display, and memoized """
+
     def __init__(self, row, col_num, **kwargs):
         self.kwargs = kwargs
         self.row = row
         self.column_index = 0
         self.columns_count = col_num
+        self._styled = None
 
     def __iter__(self):
         self.column_index = 0
@@ -23,7 +28,7 @@ class KqlRow(six.Iterator):
     def __next__(self):
         if self.column_index >= self.columns_count:
             raise StopIteration
-        val = self.__getitem__(self.column_index)
+        val = self.row[self.column_index]
         self.column_index = self.column_index + 1
         return val
 
@@ -32,7 +37,20 @@ class KqlRow(six.Iterator):
             s = self.row[key]
             return KqlRow(s, len(s), **self.kwargs)
         else:
-            return Display.to_styled_class(self.row[key], **self.kwargs)
+            return self.row[key]
+
+    def get_styled(self, idx):
+        """ Returns value at idx, wrapped in styled class for display """
+        if self._styled is None:
+            self._styled = [None] * self.columns_count
+        styled = self._styled[idx]
+        if styled is None:
+            styled = self._styled[idx] = Display.to_styled_class(self.row[idx], **self.kwargs)
+        return styled
+
+    def styled_values(self):
+        """ Returns list of the row values, wrapped in styled classes for display """
+        return [self.get_styled(i) for i in range(self.columns_count)]
 
     def __len__(self):
         return self.columns_count
@@ -41,14 +59,14 @@ class KqlRow(six.Iterator):
         if len(other) != self.columns_count:
             return False
         for i in range(self.columns_count):
-            s = self.__getitem__(i)
+            s = self.row[i]
             o = other[i]
             if o != s:
                 return False
         return True
 
     def __str__(self):
-        return ", ".join(str(self.__getitem__(i)) for i in range(self.columns_count))
+        return ", ".join(str(self.get_styled(i)) for i in range(self.columns_count))
 
     def __repr__(self):
         return self.row.__repr__()
@@ -86,12 +104,30 @@ class KqlResponse(object):
         self.kwargs = kwargs
         self.completion_query_info = response.completion_query_info_results
         self.completion_query_resource_consumption = response.completion_query_resource_consumption_results
-        self.tables = [KqlTableResponse(t, response.visualization_results.get(t.id, {})) for t in response.primary_results]
+        # records above auto_limit are dropped, one extra record is requested from the service to know whether the result was truncated
+        auto_limit = kwargs.get("auto_limit")
+        truncated_ids = set()
+        if auto_limit is not None and auto_limit > 0:
+            for t in response.primary_results:
+                if t.rows_count > auto_limit:
+                    t.replace_rows(t.rows[:auto_limit])
+                    truncated_ids.add(t.id)
+        dictionary_encoding_threshold = kwargs.get("dictionary_encoding_threshold")
+        if dictionary_encoding_threshold:
+            for t in response.primary_results:
+                t.dictionary_encode(dictionary_encoding_threshold)
+        self.tables = [
+            KqlTableResponse(t, response.visualization_results.get(t.id, {}), truncated=t.id in truncated_ids) for t in response.primary_results
+        ]
+        # whether records above auto_limit were dropped from any of the tables, the raw json holds the dropped tables partially
+        self.truncated = len(truncated_ids) > 0
 
 
 class KqlTableResponse(object):
-    def __init__(self, data_table, visualization_results, **kwargs):
+    def __init__(self, data_table, visualization_results, truncated=False, **kwargs):
         self.kwargs = kwargs
+        # whether records above auto_limit were dropped
+        self.truncated = truncated
         self.visualization_properties = visualization_results
         self.data_table = data_table
         self.columns_count = self.data_table.columns_count
@@ -102,6 +138,9 @@ class KqlTableResponse(object):
     def fetchmany(self, size):
         return KqlRowsIter(self.data_table, min(size, self.data_table.rows_count), self.data_table.columns_count, **self.kwargs)
 
+    def get_row(self, idx):
+        return KqlRow(self.data_table.get_row(idx), self.data_table.columns_count, **self.kwargs)
+
     def rowcount(self):
         return self.data_table.rows_count
 
@@ -148,21 +187,126 @@ class KqlTableResponse(object):
             # return pandas.DataFrame()
             pass
 
-        frame = pandas.DataFrame(self.data_table.rows, columns=self.data_table.columns_name)
-
-        for (idx, col_name) in enumerate(self.data_table.columns_name):
-            col_type = self.data_table.columns_type[idx]
-            if col_type.lower() == "timespan":
-                frame[col_name] = pandas.to_timedelta(
-                    frame[col_name].apply(lambda t: t.replace(".", " days ") if t and "." in t.split(":")[0] else t)
-                )
-            elif col_type.lower() == "dynamic":
-                frame[col_name] = frame[col_name].apply(lambda x: json.loads(x) if x else None)
-            elif col_type in self.KQL_TO_DATAFRAME_DATA_TYPES:
-                pandas_type = self.KQL_TO_DATAFRAME_DATA_TYPES[col_type]
-                frame[col_name] = frame[col_name].astype(pandas_type, errors="raise" if raise_errors else "ignore")
+        # columns are built directly in their final dtype from a columnar decode of the table owned by the frame, and assembled without copies.
+        # the frame doesn't share arrays with the cached decode, that is used by the other exports, so it can be modified in place.
+        # frame is first keyed by column index, to support duplicate column names
+        columnar = self.data_table.to_columnar(owned=True)
+        columns = {}
+        for (idx, col_type) in enumerate(self.data_table.columns_type):
+            column = columnar.columns[idx]
+            pandas_type = self.KQL_TO_DATAFRAME_DATA_TYPES.get(col_type)
+            if pandas_type in self._DATAFRAME_NUMERIC_TYPES:
+                if isinstance(column, numpy.ma.MaskedArray):
+                    column = self._nullable_int_to_dataframe_column(column)
+                elif column.dtype.kind == "O":
+                    # values that don't fit the type (nulls in bool column, negative ulong)
+                    if raise_errors:
+                        column = column.astype(pandas_type)
+                elif column.dtype.kind != "f" or pandas_type == "float64":
+                    column = column.astype(pandas_type, copy=False)
+            if idx in self.data_table.dictionaries:
+                values, codes = self.data_table.dictionaries[idx]
+                column = pandas.Categorical.from_codes(codes.copy(), categories=values)
+            columns[idx] = column
+
+        frame = pandas.DataFrame(columns, index=pandas.RangeIndex(self.data_table.rows_count), copy=False)
+        frame.columns = self.data_table.columns_name
         return frame
 
+    _DATAFRAME_NUMERIC_TYPES = frozenset(["bool", "int32", "int64", "uint64", "float64"])
+
+    # largest integer that float64 represents exactly
+    _FLOAT64_MAX_EXACT_INT = 2 ** 53
+
+    @staticmethod
+    def _nullable_int_to_dataframe_column(column):
+        """ints with nulls are float64 with NaN nulls, as in pandas, unless a value exceeds the float64 precision, then they are kept as objects"""
+        data = column.data
+        if len(data) == 0 or (data.min() >= -KqlTableResponse._FLOAT64_MAX_EXACT_INT and data.max() <= KqlTableResponse._FLOAT64_MAX_EXACT_INT):
+            return column.astype("float64").filled(numpy.nan)
+        values = numpy.empty(len(data), dtype=object)
+        values[:] = column.tolist()
+        return values
+
+    def to_arrow(self):
+        """Returns pyarrow Table."""
+        import pyarrow
+
+        columnar = self.data_table.to_columnar()
+        arrays = []
+        for (idx, col_type) in enumerate(self.data_table.columns_type):
+            arrow_type = self.KQL_TO_ARROW_DATA_TYPES.get(col_type)
+            column = columnar.columns[idx]
+            if idx in self.data_table.dictionaries:
+                values, codes = self.data_table.dictionaries[idx]
+                arrays.append(pyarrow.DictionaryArray.from_arrays(pyarrow.array(codes, mask=codes < 0), pyarrow.array(values, type=pyarrow.string())))
+            elif arrow_type == "large_string":
+                # dynamic values are exported as their json text, not as the parsed objects
+                values = [row[idx] if row[idx] is None or isinstance(row[idx], six.string_types) else json.dumps(row[idx]) for row in self.data_table.rows]
+                arrays.append(pyarrow.array(values, type=pyarrow.large_string()))
+            elif arrow_type == "dictionary":
+                arrays.append(pyarrow.array(column, type=pyarrow.string(), from_pandas=True).dictionary_encode())
+            elif arrow_type is not None and isinstance(column, numpy.ma.MaskedArray):
+                # nullable int columns, built from the int values and the nulls mask
+                arrays.append(pyarrow.array(column.data, mask=column.mask, type=self._get_arrow_type(pyarrow, arrow_type)))
+            elif arrow_type is not None and (column.dtype.kind != "O" or arrow_type == "string"):
+                # NaT is converted to null
+                arrays.append(pyarrow.array(column, type=self._get_arrow_type(pyarrow, arrow_type), from_pandas=True))
+            else:
+                # values that don't fit the type (e.g. negative ulong), type is inferred by pyarrow
+                arrays.append(pyarrow.array(column.tolist(), from_pandas=True))
+        return pyarrow.Table.from_arrays(arrays, names=list(self.data_table.columns_name))
+
+    def to_parquet(self, file_path, compression="snappy", **kwargs):
+        """Writes the table to parquet file. Kusto columns types and visualization properties are stored in the file metadata.
+        Any other parameters are passed on to pyarrow.parquet.write_table."""
+        import pyarrow.parquet
+
+        table = self.to_arrow()
+        kql_metadata = {"Columns": self.data_table.columns, "Visualization": self.visualization_properties}
+        metadata = dict(table.schema.metadata or {})
+        metadata[self.PARQUET_METADATA_KEY] = json.dumps(kql_metadata).encode("utf-8")
+        pyarrow.parquet.write_table(table.replace_schema_metadata(metadata), file_path, compression=compression, **kwargs)
+        return file_path
+
+    PARQUET_METADATA_KEY = "{0}.table".format(Constants.MAGIC_CLASS_NAME).encode("utf-8")
+
+    @staticmethod
+    def _get_arrow_type(pyarrow, arrow_type):
+        if arrow_type == "timestamp":
+            return pyarrow.timestamp("ns")
+        elif arrow_type == "duration":
+            return pyarrow.duration("ns")
+        return getattr(pyarrow, arrow_type)()
+
+    KQL_TO_ARROW_DATA_TYPES = {
+        "bool": "bool_",
+        "uint8": "int64",
+        "int16": "int64",
+        "uint16": "int64",
+        "int": "int32",
+        "uint": "int64",
+        "long": "int64",
+        "ulong": "uint64",
+        "float": "float64",
+        "real": "float64",
+        "decimal": "float64",
+        "string": "dictionary",
+        "datetime": "timestamp",
+        "guid": "string",
+        "timespan": "duration",
+        "dynamic": "large_string",
+        # Support V1
+        "DateTime": "timestamp",
+        "Int32": "int32",
+        "Int64": "int64",
+        "Double": "float64",
+        "String": "dictionary",
+        "SByte": "string",
+        "Guid": "string",
+        "TimeSpan": "duration",
+    }
+
     KQL_TO_DATAFRAME_DATA_TYPES = {
         "bool": "bool",
         "uint8": "int64",
@@ -171,7 +315,7 @@ class KqlTableResponse(object):
         "int": "int64",
         "uint": "int64",
         "long": "int64",
-        "ulong": "int64",
+        "ulong": "uint64",
         "float": "float64",
         "real": "float64",
         "decimal": "float64",
@@ -61,3 +61,9 @@ class KustoEngine(KqlEngine):
             return cluster_connection.get_client()
         else:
             return self.client
+
+    def _limit_query_records(self, query, max_records):
+        # management commands don't accept set statements
+        if query.lstrip().startswith("."):
+            return query
+        return "set query_take_max_records={0};\n{1}".format(max_records, query)
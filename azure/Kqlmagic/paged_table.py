@@ -0,0 +1,152 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import uuid
+import weakref
+from IPython import get_ipython
+from Kqlmagic.constants import Constants
+from Kqlmagic.table_html import Table_html
+
+
+class Paged_table(object):
+    """
+    Displays a result set one page at a time.
+    Pages are rendered by the kernel on request of the front end, through a comm channel,
+    sort and filter are applied by the kernel over the result set rows.
+    """
+
+    COMM_TARGET_NAME = "{0}_paged_table".format(Constants.MAGIC_CLASS_NAME)
+    DEFAULT_PAGE_SIZE = 100
+
+    # result sets are not kept alive by the displayed tables
+    _result_sets = weakref.WeakValueDictionary()
+    _comm_target_registered = False
+
+    @staticmethod
+    def register_comm_target():
+        "registers comm target in the kernel, returns False if there is no kernel"
+        if not Paged_table._comm_target_registered:
+            ip = get_ipython()
+            kernel = getattr(ip, "kernel", None)
+            if kernel is None:
+                return False
+            kernel.comm_manager.register_target(Paged_table.COMM_TARGET_NAME, Paged_table._on_comm_open)
+            Paged_table._comm_target_registered = True
+        return True
+
+    @staticmethod
+    def _on_comm_open(comm, open_msg):
+        @comm.on_msg
+        def _recv(msg):
+            try:
+                comm.send(Paged_table.get_page(**msg["content"]["data"]))
+            except Exception as e:
+                comm.send({"error": str(e)})
+
+    @staticmethod
+    def get_page(table_id, page=0, page_size=DEFAULT_PAGE_SIZE, sort_by=None, ascending=True, filter=None, **kwargs):
+        "returns page of rows, as html cells, after filter and sort are applied"
+        result_set = Paged_table._result_sets.get(table_id)
+        if result_set is None:
+            return {"error": "result is no longer available, rerun the cell"}
+        result_set._update_pending_fork_result()
+        order = Paged_table._get_order(result_set, sort_by, ascending, filter)
+        pages_count = max(1, (len(order) + page_size - 1) // page_size)
+        page = min(max(0, page), pages_count - 1)
+        rows = [
+            [Table_html._to_cell_html(value) for value in result_set[row_idx].styled_values()]
+            for row_idx in order[page * page_size : (page + 1) * page_size]
+        ]
+        return {"table_id": table_id, "page": page, "pages_count": pages_count, "rows_count": len(order), "rows": rows}
+
+    @staticmethod
+    def _get_order(result_set, sort_by, ascending, filter):
+        "returns list of the indexes of the rows to display, in display order. Computed once per result set, sort and filter"
+        cache_key = ("paged_table_order", sort_by, ascending, filter)
+        order = result_set._table_html_cache.get(cache_key)
+        if order is None:
+            order = list(range(len(result_set)))
+            if filter:
+                text = filter.lower()
+                order = [row_idx for row_idx in order if any(text in str(value).lower() for value in result_set[row_idx])]
+            if sort_by is not None:
+                column = [result_set[row_idx][sort_by] for row_idx in range(len(result_set))]
+                try:
+                    # nulls first, like kusto sort asc
+                    order.sort(key=lambda row_idx: (column[row_idx] is not None, column[row_idx]), reverse=not ascending)
+                except TypeError:
+                    # values of different types, sort by their string
+                    order.sort(key=lambda row_idx: str(column[row_idx]), reverse=not ascending)
+            result_set._table_html_cache[cache_key] = order
+        return order
+
+    @staticmethod
+    def get_html(result_set, page_size=None):
+        "returns first page of the result set as html, with the script that requests the other pages from the kernel"
+        page_size = page_size or Paged_table.DEFAULT_PAGE_SIZE
+        table_id = uuid.uuid4().hex
+        Paged_table._result_sets[table_id] = result_set
+        first_page = Paged_table.get_page(table_id, 0, page_size)
+        head = "".join(
+            '<th data-col="{0}" style="cursor:pointer">{1}</th>'.format(idx, Table_html._to_cell_html(name)) for (idx, name) in enumerate(result_set.field_names)
+        )
+        body = "".join("<tr>" + "".join("<td>{0}</td>".format(cell) for cell in row) + "</tr>" for row in first_page["rows"])
+        info = "page 1 of {0} ({1} rows)".format(first_page["pages_count"], first_page["rows_count"])
+        html = """<div id="{table_id}">
+            <div class="paged-table-controls">
+                <button class="paged-table-prev">&lt;</button>
+                <span class="paged-table-info">{info}</span>
+                <button class="paged-table-next">&gt;</button>
+                <input class="paged-table-filter" type="text" placeholder="filter">
+            </div>
+            <table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>
+        </div>
+        <script>
+        (function() {{
+            var root = document.getElementById("{table_id}");
+            if (!window.Jupyter || !Jupyter.notebook || !Jupyter.notebook.kernel) {{
+                root.querySelector(".paged-table-controls").style.display = "none";
+                return;
+            }}
+            var tbody = root.querySelector("tbody");
+            var info = root.querySelector(".paged-table-info");
+            var state = {{table_id: "{table_id}", page: 0, page_size: {page_size}, sort_by: null, ascending: true, filter: ""}};
+            var comm = Jupyter.notebook.kernel.comm_manager.new_comm("{target}", {{}});
+            comm.on_msg(function(msg) {{
+                var data = msg.content.data;
+                if (data.error) {{
+                    info.textContent = data.error;
+                    return;
+                }}
+                state.page = data.page;
+                tbody.innerHTML = data.rows.map(function(row) {{
+                    return "<tr>" + row.map(function(cell) {{ return "<td>" + cell + "</td>"; }}).join("") + "</tr>";
+                }}).join("");
+                info.textContent = "page " + (data.page + 1) + " of " + data.pages_count + " (" + data.rows_count + " rows)";
+            }});
+            function request(page) {{
+                state.page = page;
+                comm.send(state);
+            }}
+            root.querySelector(".paged-table-prev").onclick = function() {{ request(state.page - 1); }};
+            root.querySelector(".paged-table-next").onclick = function() {{ request(state.page + 1); }};
+            root.querySelector(".paged-table-filter").onchange = function() {{
+                state.filter = this.value;
+                request(0);
+            }};
+            root.querySelectorAll("th").forEach(function(th) {{
+                th.onclick = function() {{
+                    var col = parseInt(th.getAttribute("data-col"));
+                    state.ascending = state.sort_by === col ? !state.ascending : true;
+                    state.sort_by = col;
+                    request(0);
+                }};
+            }});
+        }})();
+        </script>""".format(
+            table_id=table_id, info=info, head=head, body=body, page_size=page_size, target=Paged_table.COMM_TARGET_NAME
+        )
+        return {"body": html}
@@ -125,6 +125,10 @@ class Parser(object):
         options_table = {
             "ad": {"abbreviation": "auto_dataframe"},
             "auto_dataframe": {"flag": "auto_dataframe", "type": "bool", "config": "config.auto_dataframe"},
+            "krj": {"abbreviation": "keep_raw_json"},
+            "keep_raw_json": {"flag": "keep_raw_json", "type": "bool", "config": "config.keep_raw_json"},
+            "det": {"abbreviation": "dictionary_encoding_threshold"},
+            "dictionary_encoding_threshold": {"flag": "dictionary_encoding_threshold", "type": "int", "config": "config.dictionary_encoding_threshold"},
             "se": {"abbreviation": "short_errors"},
             "short_errors": {"flag": "short_errors", "type": "bool", "config": "config.short_errors"},
             "f": {"abbreviation": "feedback"},
@@ -151,6 +155,14 @@ class Parser(object):
             "last_raw_result_var": {"flag": "last_raw_result_var", "type": "str", "config": "config.last_raw_result_var"},
             "tp": {"abbreviation": "table_package"},
             "table_package": {"flag": "table_package", "type": "str", "config": "config.table_package"},
+            "cpb": {"abbreviation": "chart_points_budget"},
+            "chart_points_budget": {"flag": "chart_points_budget", "type": "int", "config": "config.chart_points_budget"},
+            "cds": {"abbreviation": "chart_downsampling"},
+            "chart_downsampling": {"flag": "chart_downsampling", "type": "str", "config": "config.chart_downsampling"},
+            "cr": {"abbreviation": "chart_renderer"},
+            "chart_renderer": {"flag": "chart_renderer", "type": "str", "config": "config.chart_renderer"},
+            "wpt": {"abbreviation": "webgl_points_threshold"},
+            "webgl_points_threshold": {"flag": "webgl_points_threshold", "type": "int", "config": "config.webgl_points_threshold"},
             "pp": {"abbreviation": "plot_package"},
             "plot_package": {"flag": "plot_package", "type": "str", "config": "config.plot_package"},
             "df": {"abbreviation": "dsn_filename"},
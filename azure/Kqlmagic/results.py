@@ -6,17 +6,26 @@
 
 import copy
 import functools
+import re
+import sys
+import json
+import itertools
+import io
+import gzip
 import operator
 import csv
 import six
-import codecs
 import os.path
-import re
 import uuid
 import prettytable
 from Kqlmagic.column_guesser import ColumnGuesserMixin
 
 from Kqlmagic.display import Display
+from Kqlmagic.kql_proxy import KqlRow
+from Kqlmagic.table_html import Table_html
+from Kqlmagic.paged_table import Paged_table
+from Kqlmagic.chart_downsampler import Chart_downsampler
+from Kqlmagic.chart_html import Chart_html
 
 from Kqlmagic.palette import Palette, Palettes
 
@@ -39,43 +48,6 @@ def _unduplicate_field_names(field_names):
     return res
 
 
-class UnicodeWriter(object):
-    """
-    A CSV writer which will write rows to CSV file "f",
-    which is encoded in the given encoding.
-    """
-
-    # Object constructor
-    def __init__(self, f, dialect=csv.excel, encoding="utf-8", **kwds):
-        # Redirect output to a queue
-        self.queue = six.StringIO()
-        self.writer = csv.writer(self.queue, dialect=dialect, **kwds)
-        self.stream = f
-        self.encoder = codecs.getincrementalencoder(encoding)()
-
-    def writerow(self, row):
-        if six.PY2:
-            _row = [s.encode("utf-8") if hasattr(s, "encode") else s for s in row]
-        else:
-            _row = row
-        self.writer.writerow(_row)
-        # Fetch UTF-8 output from the queue ...
-        data = self.queue.getvalue()
-        if six.PY2:
-            data = data.decode("utf-8")
-            # ... and reencode it into the target encoding
-            data = self.encoder.encode(data)
-        # write to the target stream
-        self.stream.write(data)
-        # empty queue
-        self.queue.truncate(0)
-        self.queue.seek(0)
-
-    def writerows(self, rows):
-        for row in rows:
-            self.writerow(row)
-
-
 class FileResultDescriptor(bytes):
     """Provides IPython Notebook-friendly output for the feedback after a ``.csv`` called."""
 
@@ -160,18 +132,85 @@ class FileResultDescriptor(bytes):
             return self._get_data()
 
 
-def _nonbreaking_spaces(match_obj):
+_RENDER_OPERATOR_PATTERN = re.compile(r"\|\s*render\s")
+
+# options that affect the chart figure, part of the figure cache key
+_CHART_OPTIONS = (
+    "palette_name",
+    "palette_colors",
+    "palette_desaturation",
+    "palette_reverse",
+    "chart_points_budget",
+    "chart_downsampling",
+    "chart_renderer",
+    "webgl_points_threshold",
+    "plotly_fs_includejs",
+)
+
+
+def _to_json_text(value):
+    return value if isinstance(value, six.string_types) else json.dumps(value)
+
+
+def _get_deep_size(obj):
+    "size in bytes of obj and of the objects it contains, each object is counted once"
+    seen = set()
+    size = 0
+    pending = [obj]
+    while pending:
+        o = pending.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            pending.extend(o.keys())
+            pending.extend(o.values())
+        elif isinstance(o, (list, tuple, set)):
+            pending.extend(o)
+        elif getattr(o, "dtype", None) is not None and o.dtype.kind == "O":
+            pending.extend(o.tolist())
+    return size
+
+
+class ResultSetIndex(object):
     """
-    Make spaces visible in HTML by replacing all `` `` with ``&nbsp;``
+    Hash index of a result set by the values of a column.
 
-    Call with a ``re`` match object.  Retain group 1, replace group 2
-    with nonbreaking speaces.
+    Access by value returns the row, KeyError is raised if the value is missing or not unique.
     """
-    spaces = "&nbsp;" * len(match_obj.group(2))
-    return "%s%s" % (match_obj.group(1), spaces)
 
+    # Object constructor
+    def __init__(self, result_set, column_idx):
+        self.result_set = result_set
+        self.column_idx = column_idx
+        self.rows_idx = {}
+        for (row_idx, row) in enumerate(result_set):
+            self.rows_idx.setdefault(row[column_idx], []).append(row_idx)
+
+    def get_all(self, key):
+        "Returns list of the rows with the value"
+        return [self.result_set[row_idx] for row_idx in self.rows_idx.get(key, [])]
 
-_cell_with_spaces_pattern = re.compile(r"(<td>)( {2,})")
+    def __getitem__(self, key):
+        rows_idx = self.rows_idx.get(key)
+        if not rows_idx:
+            raise KeyError(key)
+        if len(rows_idx) > 1:
+            raise KeyError('%d results for "%s"' % (len(rows_idx), key))
+        return self.result_set[rows_idx[0]]
+
+    def __contains__(self, key):
+        return key in self.rows_idx
+
+    def __len__(self):
+        return len(self.rows_idx)
+
+
+def _rebuild_result_set(cls, state):
+    result_set = cls.__new__(cls)
+    result_set._set_state(state)
+    return result_set
 
 
 class ResultSet(list, ColumnGuesserMixin):
@@ -201,6 +240,11 @@ class ResultSet(list, ColumnGuesserMixin):
         self.display_info = True
         self.suppress_result = False
 
+        # set when the query was refreshed by another fork, applied on next access
+        self._pending_query_result = None
+        # set by refresh, to refresh incrementally by the time column
+        self._incremental_time_column = None
+        self._incremental_last_max = None
         self._update(queryResult)
 
     def _get_palette(self, n_colors=None, desaturation=None):
@@ -252,8 +296,20 @@ class ResultSet(list, ColumnGuesserMixin):
     def elapsed_timespan(self):
         return self.end_time - self.start_time
 
+    @property
+    def _queryResult(self):
+        "query result of the result set, a pending refresh by another fork is applied first"
+        self._update_pending_fork_result()
+        return self._query_result
+
+    @property
+    def _table(self):
+        "table of the result set in the query result, a pending refresh by another fork is applied first"
+        self._update_pending_fork_result()
+        return self._table_response
+
     def _update(self, queryResult):
-        self._queryResult = queryResult
+        self._query_result = queryResult
         self._completion_query_info = queryResult.completion_query_info
         self._completion_query_resource_consumption = queryResult.completion_query_resource_consumption
         self._json_response = queryResult.json_response
@@ -268,47 +324,100 @@ class ResultSet(list, ColumnGuesserMixin):
         self.records_count = queryResultTable.recordscount()
         self.visualization = queryResultTable.visualization_property("Visualization")
         self.title = queryResultTable.visualization_property("Title")
-        # table
-        auto_limit = 0 if not self.options.get("auto_limit") else self.options.get("auto_limit")
-        if queryResultTable.returns_rows():
-            if auto_limit > 0:
-                list.__init__(self, queryResultTable.fetchmany(size=auto_limit))
-            else:
-                list.__init__(self, queryResultTable.fetchall())
-
-        else:
-            list.__init__(self, [])
+        # table, rows are not materialized, they are views over the response table rows, created on access
+        self._table_response = queryResultTable
+        # row views by position, filled on access. Records above auto_limit were already dropped from the table
+        self._rows = [None] * (queryResultTable.rowcount() if queryResultTable.returns_rows() else 0)
+        # hash indexes by column, built on first lookup
+        self._indexes = {}
+        # rendered html table by display limit and style, and paged table rows order by sort and filter
+        self._table_html_cache = {}
+        # chart html and figure by visualization, chart options and window mode
+        self._chart_cache = {}
+        self.truncated = queryResultTable.truncated
 
         self._fork_table_resultSets[str(self.fork_table_id)] = self
 
-    def _create_fork_results(self):
-        if self.fork_table_id == 0 and len(self._fork_table_resultSets) == 1:
-            for fork_table_id in range(1, len(self._queryResult.tables)):
-                r = ResultSet(self._queryResult, self.parametrized_query, fork_table_id, self._fork_table_resultSets, self.metadata, self.options)
-                if r.options.get("feedback"):
-                    minutes, seconds = divmod(self.elapsed_timespan, 60)
-                    r.feedback_info.append("Done ({:0>2}:{:06.3f}): {} records".format(int(minutes), seconds, r.records_count))
+    def _create_fork_result(self, fork_table_id):
+        root = self._fork_table_resultSets["0"]
+        r = ResultSet(root._queryResult, root.parametrized_query, fork_table_id, self._fork_table_resultSets, root.metadata, root.options)
+        r._set_fork_feedback_info()
+        return r
+
+    def _set_fork_feedback_info(self):
+        self.display_info = True
+        self.suppress_result = False
+        self.feedback_info = []
+        if self.options.get("feedback"):
+            minutes, seconds = divmod(self.elapsed_timespan, 60)
+            self.feedback_info.append("Done ({:0>2}:{:06.3f}): {} records{}".format(int(minutes), seconds, self.records_count, " (truncated to auto_limit)" if self.truncated else ""))
 
     def _update_fork_results(self):
+        "forks are not updated on refresh, only marked, they are updated on next access"
         if self.fork_table_id == 0:
             for r in self._fork_table_resultSets.values():
-                if r != self:
-                    r._update(self._queryResult)
+                if r is not self:
+                    r._pending_query_result = self._query_result
                     r.metadata = self.metadata
-                    r.display_info = True
-                    r.suppress_result = False
-                    r.feedback_info = []
-                    if r.options.get("feedback"):
-                        minutes, seconds = divmod(self.elapsed_timespan, 60)
-                        r.feedback_info.append("Done ({:0>2}:{:06.3f}): {} records".format(int(minutes), seconds, r.records_count))
+
+    def _update_pending_fork_result(self):
+        if self._pending_query_result is not None:
+            query_result = self._pending_query_result
+            self._pending_query_result = None
+            self._update(query_result)
+            self._set_fork_feedback_info()
 
     def fork_result(self, fork_table_id=0):
-        #return self._fork_table_resultSets.get(str(fork_table_id))
-        return self._fork_table_resultSets[str(fork_table_id)]
+        "result of the table fork_table_id (table position, or its string) in the response, created on first access"
+        key = str(fork_table_id)
+        r = self._fork_table_resultSets.get(key)
+        if r is None:
+            root = self._fork_table_resultSets["0"]
+            if not key.isdigit() or not 0 < int(key) < len(root._queryResult.tables):
+                raise KeyError(key)
+            r = self._create_fork_result(int(key))
+        r._update_pending_fork_result()
+        return r
 
     @property
     def raw_json(self):
-        return Display.to_styled_class(self._json_response, **self.options)
+        json_response = self._json_response
+        if json_response is None and self._queryResult.json_response is None:
+            # raw json was released, read it back from the cache file
+            file_path = self.metadata.get("raw_json_file_path")
+            if file_path is not None and os.path.exists(file_path):
+                with open(file_path, "r") as infile:
+                    json_response = json.load(infile)
+        return Display.to_styled_class(json_response, **self.options)
+
+    def _release_raw_json(self):
+        "drops the references to the raw json response. The decoded tables keep only their own rows"
+        self._queryResult.json_response = None
+        for r in self._fork_table_resultSets.values():
+            r._json_response = None
+
+    def memory_usage(self):
+        """
+        Returns dict with the size in bytes of each representation of the result:
+        raw_json: the whole raw json response, that includes the rows (0 if released)
+        rows: the raw rows of the table
+        columnar: the columnar decode of the table, if was built
+        dataframe: the pandas dataframe, if was built (it may share its arrays with the columnar decode)
+        """
+        data_table = self._table.data_table
+        usage = {
+            "raw_json": _get_deep_size(self._json_response) if self._json_response is not None else 0,
+            "rows": _get_deep_size(data_table.rows),
+            "columnar": 0,
+            "dataframe": 0,
+        }
+        if data_table._columnar is not None:
+            usage["columnar"] = sum(
+                _get_deep_size(column) if column.dtype.kind == "O" else column.nbytes for column in data_table._columnar.columns
+            )
+        if self._dataframe is not None:
+            usage["dataframe"] = int(self._dataframe.memory_usage(deep=True).sum())
+        return usage
 
     @property
     def completion_query_info(self):
@@ -320,6 +429,7 @@ class ResultSet(list, ColumnGuesserMixin):
 
     # IPython html presentation of the object
     def _repr_html_(self):
+        self._update_pending_fork_result()
         if not self.suppress_result:
             if self.display_info:
                 Display.showInfoMessage(self.metadata.get("conn_info"))
@@ -341,18 +451,22 @@ class ResultSet(list, ColumnGuesserMixin):
 
     def _getTableHtml(self):
         "get query result in a table format as an HTML string"
-        _cell_with_spaces_pattern = re.compile(r"(<td>)( {2,})")
+        self._update_pending_fork_result()
         if self.pretty:
-            self.pretty.add_rows(self)
-            result = self.pretty.get_html_string()
-            result = _cell_with_spaces_pattern.sub(_nonbreaking_spaces, result)
             display_limit = 0 if not self.options.get("display_limit") else self.options.get("display_limit")
-            if display_limit > 0 and len(self) > display_limit:
-                result = '%s\n<span style="font-style:italic;text-align:center;">%d rows, truncated to display_limit of %d</span>' % (
-                    result,
-                    len(self),
-                    display_limit,
-                )
+            cache_key = (display_limit, self.prettytable_style)
+            result = self._table_html_cache.get(cache_key)
+            if result is None:
+                # rows beyond display_limit are not accessed
+                rows = self[:display_limit] if display_limit > 0 else self
+                result = Table_html.to_html(self.field_names, (row.styled_values() for row in rows))
+                if display_limit > 0 and len(self) > display_limit:
+                    result = '%s\n<span style="font-style:italic;text-align:center;">%d rows, truncated to display_limit of %d</span>' % (
+                        result,
+                        len(self),
+                        display_limit,
+                    )
+                self._table_html_cache[cache_key] = result
             return {"body": result}
         else:
             return {}
@@ -363,6 +477,10 @@ class ResultSet(list, ColumnGuesserMixin):
         if options.get("table_package", "").upper() == "PANDAS":
             t = self.to_dataframe()._repr_html_()
             html = Display.toHtml(body=t)
+        elif options.get("table_package", "").upper() == "PAGED" and not options.get("popup_window") and Paged_table.register_comm_target():
+            # popup window has no kernel to page from, it shows the html table
+            t = Paged_table.get_html(self, page_size=options.get("display_limit"))
+            html = Display.toHtml(**t)
         else:
             t = self._getTableHtml()
             html = Display.toHtml(**t)
@@ -384,27 +502,157 @@ class ResultSet(list, ColumnGuesserMixin):
         self.pretty.add_rows(self)
         return str(self.pretty or "")
 
+    def __len__(self):
+        return len(self._row_views)
+
+    @property
+    def _row_views(self):
+        "list of the row views, filled on access. A pending refresh by another fork is applied first"
+        self._update_pending_fork_result()
+        return self._rows
+
+    def _get_row(self, idx):
+        "returns row view at idx, views are created on first access and kept, so that their converted values are memoized"
+        row = self._rows[idx]
+        if row is None:
+            row = self._rows[idx] = self._table_response.get_row(idx)
+        return row
+
+    def __iter__(self):
+        return (self._get_row(idx) for idx in range(len(self)))
+
+    def __reversed__(self):
+        return (self._get_row(idx) for idx in range(len(self) - 1, -1, -1))
+
+    def __contains__(self, value):
+        return any(row == value for row in self)
+
+    def index(self, value, start=0, stop=sys.maxsize):
+        for idx in range(*slice(start, stop).indices(len(self))):
+            if self._get_row(idx) == value:
+                return idx
+        raise ValueError("%r is not in list" % (value,))
+
+    def count(self, value):
+        return sum(1 for row in self if row == value)
+
+    def copy(self):
+        return list(self)
+
+    def __add__(self, other):
+        return list(self) + other
+
+    def __radd__(self, other):
+        return other + list(self)
+
+    def __mul__(self, n):
+        return list(self) * n
+
+    __rmul__ = __mul__
+
+    def _get_state(self):
+        "returns the object state, row views, indexes, printed table and rendered html and charts are dropped, and rebuilt on access"
+        state = dict(self.__dict__)
+        state.pop("pretty", None)
+        state["_rows"] = [None] * len(self._rows)
+        state["_indexes"] = {}
+        state["_table_html_cache"] = {}
+        state["_chart_cache"] = {}
+        return state
+
+    def _set_state(self, state):
+        self.__dict__.update(state)
+        self.pretty = PrettyTable(self.field_names, style=self.prettytable_style) if len(self.field_names) > 0 else None
+
+    # the list storage is empty, copy and pickle rebuild the result set from its state, rows are read from the query result
+    def __reduce__(self):
+        return (_rebuild_result_set, (type(self), self._get_state()))
+
+    def __copy__(self):
+        return _rebuild_result_set(type(self), self._get_state())
+
+    def __deepcopy__(self, memo):
+        result = type(self).__new__(type(self))
+        memo[id(self)] = result
+        result._set_state(copy.deepcopy(self._get_state(), memo))
+        return result
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'ResultSet' object is read only")
+
+    # rows are views over the query response, the result set can't be modified
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, list) or len(other) != len(self):
+            return False
+        return all(row == other_row for (row, other_row) in zip(self, other))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return list(self).__repr__()
+
     # For iterator self[key]
     def __getitem__(self, key):
         """
         Access by integer (row position within result set)
         or by string (value of leftmost column)
         """
+        if isinstance(key, slice):
+            return [self._get_row(idx) for idx in range(*key.indices(len(self)))]
         try:
-            return list.__getitem__(self, key)
+            idx = operator.index(key)
         except TypeError:
-            result = [row for row in self if row[0] == key]
-            if not result or len(result) == 0:
-                raise KeyError(key)
-            if len(result) > 1:
-                raise KeyError('%d results for "%s"' % (len(result), key))
-            return result[0]
+            idx = None
+        if idx is not None:
+            rows_count = len(self)
+            if idx < 0:
+                idx += rows_count
+            if idx < 0 or idx >= rows_count:
+                raise IndexError("list index out of range")
+            return self._get_row(idx)
+        else:
+            try:
+                return self.index_by(0)[key]
+            except TypeError:
+                # unhashable values can't be indexed, fall back to scan
+                result = [row for row in self if row[0] == key]
+                if not result or len(result) == 0:
+                    raise KeyError(key)
+                if len(result) > 1:
+                    raise KeyError('%d results for "%s"' % (len(result), key))
+                return result[0]
+
+    def _decode_rows(self):
+        "returns iterator over the rows values, decoded in bulk by the table schema, without creating row views"
+        return itertools.islice(self._table.data_table.decode_rows(), len(self))
+
+    def index_by(self, column):
+        """
+        Returns hash index of the rows by the values of column (name or position).
+        The index is built on first use, and is rebuilt after refresh
+        """
+        if isinstance(column, six.integer_types):
+            column_idx = column
+        elif column in self.columns_name:
+            column_idx = self.columns_name.index(column)
+        else:
+            raise KeyError(column)
+        index = self._indexes.get(column_idx)
+        if index is None:
+            index = self._indexes[column_idx] = ResultSetIndex(self, column_idx)
+        return index
 
     def to_dict(self):
         """Returns a single dict built from the result set
         Keys are column names; values are a tuple"""
         if len(self):
-            return dict(zip(self.columns_name, zip(*self)))
+            return dict(zip(self.columns_name, zip(*self._decode_rows())))
         else:
             return dict(zip(self.columns_name, [() for c in self.columns_name]))
 
@@ -415,26 +663,89 @@ class ResultSet(list, ColumnGuesserMixin):
 
     def to_dataframe(self):
         "Returns a Pandas DataFrame instance built from the result set."
+        table = self._table
         if self._dataframe is None:
-            self._dataframe = self._queryResult.tables[self.fork_table_id].to_dataframe()
+            self._dataframe = table.to_dataframe()
 
             # import pandas as pd
             # frame = pd.DataFrame(self, columns=(self and self.columns_name) or [])
             # self._dataframe = frame
         return self._dataframe
 
+    def to_arrow(self):
+        "Returns a pyarrow Table instance built from the result set."
+        return self._table.to_arrow()
+
     def submit(self):
         "display the chart that was specified in the query"
         magic = self.metadata.get("magic")
         user_ns = magic.shell.user_ns.copy()
         return magic.execute_query(self.metadata.get("parsed"), user_ns)
 
-    def refresh(self):
-        "refresh the results of the query"
+    def refresh(self, time_column=None):
+        """
+        refresh the results of the query.
+        if time_column is specified, refresh is incremental: only rows with time_column value at or above
+        the current max value are queried, and they replace the matching rows of the result
+        """
+        self.fork_result(0)._incremental_time_column = time_column
         magic = self.metadata.get("magic")
         user_ns = magic.shell.user_ns.copy()
         return magic.execute_query(self.metadata.get("parsed"), user_ns, self)
 
+    def _get_incremental_query(self):
+        "returns the query that fetches only the tail of the result, or None if incremental refresh is not possible"
+        time_column = self._incremental_time_column
+        if time_column is None or len(self._queryResult.tables) != 1:
+            return None
+        if self.truncated:
+            # the max time of a truncated result is the max of a partial result, the whole query is executed
+            return None
+        data_table = self._queryResult.tables[0].data_table
+        if time_column not in data_table.columns_name:
+            return None
+        col_idx = data_table.columns_name.index(time_column)
+        if data_table.columns_type[col_idx] not in ("datetime", "DateTime"):
+            return None
+        last_max = None
+        for row in data_table.rows:
+            value = row[col_idx]
+            if value is not None:
+                dt = data_table.to_datetime(value)
+                if last_max is None or dt > last_max[0]:
+                    last_max = (dt, value)
+        if last_max is None:
+            return None
+        self._incremental_last_max = last_max[0]
+        # the filter is added before the render operator, which has to be last
+        render_matches = list(_RENDER_OPERATOR_PATTERN.finditer(self.parametrized_query))
+        pos = render_matches[-1].start() if render_matches else len(self.parametrized_query.rstrip().rstrip(";"))
+        tail_filter = "\n| where ['{0}'] >= datetime({1})\n".format(time_column, last_max[1])
+        return self.parametrized_query[:pos] + tail_filter + self.parametrized_query[pos:]
+
+    def _merge_incremental_result(self, queryResult):
+        "replaces the tail of the result by the incremental query result, returns False if the results don't match"
+        if len(queryResult.tables) != 1 or queryResult.tables[0].truncated:
+            return False
+        data_table = self._queryResult.tables[0].data_table
+        tail_table = queryResult.tables[0].data_table
+        if tail_table.columns_name != data_table.columns_name or tail_table.columns_type != data_table.columns_type:
+            return False
+        col_idx = data_table.columns_name.index(self._incremental_time_column)
+        rows = [row for row in data_table.rows if row[col_idx] is None or data_table.to_datetime(row[col_idx]) < self._incremental_last_max]
+        rows.extend(tail_table.rows)
+        auto_limit = self.options.get("auto_limit")
+        if auto_limit and len(rows) > auto_limit:
+            # the merged result exceeds auto_limit, the whole query is executed, to be limited by the service
+            return False
+        data_table.replace_rows(rows)
+        if self.options.get("dictionary_encoding_threshold"):
+            data_table.dictionary_encode(self.options.get("dictionary_encoding_threshold"))
+        self._queryResult.completion_query_info = queryResult.completion_query_info
+        self._queryResult.completion_query_resource_consumption = queryResult.completion_query_resource_consumption
+        self._update(self._queryResult)
+        return True
+
     def show_chart(self, **kwargs):
         "display the chart that was specified in the query"
         options = {**self.options, **kwargs}
@@ -495,12 +806,24 @@ class ResultSet(list, ColumnGuesserMixin):
         return self.visualization and not self.visualization == "table"
 
     def _getChartHtml(self, window_mode=False):
-        "get query result in a char format as an HTML string"
-        # https://kusto.azurewebsites.net/docs/queryLanguage/query_language_renderoperator.html
-
+        "get query result in a char format as an HTML string, memoized until the result is updated"
+        self._update_pending_fork_result()
         if not self.is_chart():
             return {}
 
+        cache_key = (self.visualization, self.title, bool(window_mode)) + tuple(self.options.get(name) for name in _CHART_OPTIONS)
+        cached = self._chart_cache.get(cache_key)
+        if cached is None:
+            cached = self._chart_cache[cache_key] = self._build_chart_html(window_mode)
+        (result, figure_or_data) = cached
+        if figure_or_data is not None:
+            self.metadata["figure_or_data"] = figure_or_data
+        return result
+
+    def _build_chart_html(self, window_mode=False):
+        "returns chart html, and the plotly figure"
+        # https://kusto.azurewebsites.net/docs/queryLanguage/query_language_renderoperator.html
+
         if len(self) == 0:
             id = uuid.uuid4().hex
             head = (
@@ -515,7 +838,7 @@ class ResultSet(list, ColumnGuesserMixin):
             )
 
             body = '<div id="uuid-' + id + '"><br><br>EMPTY CHART (no data)<br><br>.</div>'
-            return {"body": body, "head": head}
+            return {"body": body, "head": head}, None
 
         figure_or_data = None
         # First column is color-axis, second column is numeric
@@ -563,21 +886,11 @@ class ResultSet(list, ColumnGuesserMixin):
             figure_or_data = self._render_scatterchart_plotly(" ", self.title)
 
         if figure_or_data is not None:
-            self.metadata["figure_or_data"] = figure_or_data
             if window_mode:
-                head = (
-                    '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script>'
-                    if window_mode and not self.options.get("plotly_fs_includejs", False)
-                    else ""
-                )
-                body = plotly.offline.plot(
-                    figure_or_data, include_plotlyjs=window_mode and self.options.get("plotly_fs_includejs", False), output_type="div"
-                )
-                return {"body": body, "head": head}
+                return Chart_html.to_html(figure_or_data, include_plotlyjs=self.options.get("plotly_fs_includejs", False)), figure_or_data
             else:
-                self
-                return {"fig": figure_or_data}
-        return {}
+                return {"fig": figure_or_data}, figure_or_data
+        return {}, None
 
     def pie(self, key_word_sep=" ", title=None, **kwargs):
         """Generates a pylab pie chart from the result set.
@@ -670,31 +983,59 @@ class ResultSet(list, ColumnGuesserMixin):
         plt.ylabel(self.ys[0].name)
         return plot
 
-    def to_csv(self, filename=None, **kwargs):
+    def to_csv(self, filename=None, compression=None, buffer_size=None, **kwargs):
         """Generate results in comma-separated form.  Write to ``filename`` if given.
+           Rows are streamed to the file in chunks. compression="gzip" (default for a ``filename`` that ends with .gz)
+           writes gzip compressed csv, buffer_size sets the file write buffer size in bytes.
            Any other parameters will be passed on to csv.writer."""
         if not self.pretty:
             return None  # no results
-        self.pretty.add_rows(self)
+        encoding = kwargs.pop("encoding", "utf-8")
         if filename:
-            encoding = kwargs.get("encoding", "utf-8")
-            if six.PY2:
-                outfile = open(filename, "wb")
+            if compression is None and filename.endswith(".gz"):
+                compression = "gzip"
+            if compression == "gzip":
+                outfile = io.TextIOWrapper(
+                    io.BufferedWriter(gzip.GzipFile(filename, "wb"), buffer_size or io.DEFAULT_BUFFER_SIZE), encoding=encoding, newline=""
+                )
+            elif compression is None:
+                outfile = open(filename, "w", newline="", encoding=encoding, buffering=buffer_size or -1)
             else:
-                outfile = open(filename, "w", newline="", encoding=encoding)
+                raise ValueError("unsupported csv compression: {0}".format(compression))
         else:
             outfile = six.StringIO()
-        writer = UnicodeWriter(outfile, **kwargs)
-        writer.writerow(self.field_names)
-        for row in self:
-            writer.writerow(row)
+        try:
+            writer = csv.writer(outfile, **kwargs)
+            writer.writerow(self.field_names)
+            # rows are written from the raw rows, without creating row objects. dynamic values are written as their raw json text,
+            # only datetime and timespan values are converted
+            data_table = self._table.data_table
+            rows = itertools.islice(data_table.decode_rows(data_table.schema.with_converters({"dynamic": _to_json_text})), len(self))
+            while True:
+                chunk = list(itertools.islice(rows, self._CSV_CHUNK_ROWS))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+        finally:
+            if filename:
+                outfile.close()
         if filename:
-            outfile.close()
             message = 'csv results'
-            return FileResultDescriptor(filename, message=message, format='csv', **kwargs)
+            return FileResultDescriptor(filename, message=message, format='csv')
         else:
             return outfile.getvalue()
 
+    _CSV_CHUNK_ROWS = 10000
+
+    def to_parquet(self, filename, compression="snappy", **kwargs):
+        """Write results to parquet file ``filename``.
+           Kusto columns types and visualization properties are kept in the file metadata,
+           so the file can be read back by the cache engine.
+           Any other parameters will be passed on to pyarrow.parquet.write_table."""
+        self._table.to_parquet(filename, compression=compression, **kwargs)
+        message = 'parquet results'
+        return FileResultDescriptor(filename, message=message, format='parquet')
+
     def _render_pie(self, key_word_sep=" ", title=None, **kwargs):
         """Generates a pylab pie chart from the result set.
 
@@ -972,6 +1313,30 @@ class ResultSet(list, ColumnGuesserMixin):
         fig = go.FigureWidget(data=data, layout=layout)
         return fig
 
+    def _get_chart_series(self, title):
+        "returns (x, y) points of the chart sub tables, downsampled to the chart points budget, and the title with downsampling indication"
+        points_budget = self.options.get("chart_points_budget")
+        series = []
+        downsampled = False
+        for tab in self.chart_sub_tables:
+            xs, ys, is_downsampled = Chart_downsampler.downsample(
+                list(tab.keys()), list(tab.values()), points_budget, self.options.get("chart_downsampling")
+            )
+            series.append((xs, ys))
+            downsampled = downsampled or is_downsampled
+        if downsampled:
+            title = "{0} (downsampled to {1} points per series)".format(title, points_budget)
+        return series, title
+
+    def _get_scatter_trace_class(self, points_count):
+        "returns go.Scattergl (webgl) if chart_renderer is webgl, or is auto and the chart points exceed webgl_points_threshold, else go.Scatter (svg)"
+        renderer = self.options.get("chart_renderer")
+        if renderer == "webgl":
+            return go.Scattergl
+        if renderer == "auto" and self.options.get("webgl_points_threshold") and points_count > self.options.get("webgl_points_threshold"):
+            return go.Scattergl
+        return go.Scatter
+
     def _render_timechart_plotly(self, key_word_sep=" ", title=None, **kwargs):
         """Generates a pylab plot from the result set.
 
@@ -1000,16 +1365,18 @@ class ResultSet(list, ColumnGuesserMixin):
         ylabel = ", ".join(ylabel_names)
         xlabel = self.chart_sub_tables[0].col_x.name
         n_colors = len(self.chart_sub_tables)
+        series, title = self._get_chart_series(title or "timechart")
+        scatter = self._get_scatter_trace_class(sum(len(xs) for (xs, ys) in series))
 
         data = [
-            go.Scatter(
-                x=list(tab.keys()), 
-                y=list(tab.values()), 
+            scatter(
+                x=xs, 
+                y=ys, 
                 name=tab.name, 
                 line=dict(width=1, color=self.get_color_from_palette(idx, n_colors=n_colors)), 
                 opacity=0.8
             )
-            for idx, tab in enumerate(self.chart_sub_tables)
+            for idx, (tab, (xs, ys)) in enumerate(zip(self.chart_sub_tables, series))
         ]
 
         layout = go.Layout(
@@ -1200,16 +1567,18 @@ class ResultSet(list, ColumnGuesserMixin):
         ylabel = ", ".join(ylabel_names)
         xlabel = self.chart_sub_tables[0].col_x.name
         n_colors = len(self.chart_sub_tables)
+        series, title = self._get_chart_series(title or "linechart")
+        scatter = self._get_scatter_trace_class(sum(len(xs) for (xs, ys) in series))
 
         data = [
-            go.Scatter(
-                x=list(tab.keys()), 
-                y=list(tab.values()), 
+            scatter(
+                x=xs, 
+                y=ys, 
                 name=tab.name, 
                 line=dict(width=1, color=self.get_color_from_palette(idx, n_colors=n_colors)), 
                 opacity=0.8
             )
-            for idx, tab in enumerate(self.chart_sub_tables)
+            for idx, (tab, (xs, ys)) in enumerate(zip(self.chart_sub_tables, series))
         ]
         layout = go.Layout(
             title=title or "linechart",
@@ -1258,8 +1627,9 @@ class ResultSet(list, ColumnGuesserMixin):
 
         ylabel = ", ".join([c.name for c in ys])
         xlabel = xticks.name
+        scatter = self._get_scatter_trace_class(len(xticks) * len(ys))
         data = [
-            go.Scatter(
+            scatter(
                 x=xticks,
                 y=yticks,
                 name=yticks.name,
@@ -1307,4 +1677,5 @@ class PrettyTable(prettytable.PrettyTable):
         else:
             self.row_count = min(len(data), self.display_limit)
         for row in data[: self.display_limit]:
-            self.add_row(row)
+            # values are styled for display only
+            self.add_row(row.styled_values() if isinstance(row, KqlRow) else row)
@@ -0,0 +1,37 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+from html import escape
+
+
+class Table_html(object):
+    """
+    Renders rows as an html table, in the same layout as prettytable html.
+    Cells are escaped and written straight into a lines buffer.
+    """
+
+    @staticmethod
+    def to_html(field_names, rows):
+        lines = ["<table>", "    <tr>"]
+        for field in field_names:
+            lines.append("        <th>%s</th>" % escape(str(field)).replace("\n", "<br>"))
+        lines.append("    </tr>")
+        for row in rows:
+            lines.append("    <tr>")
+            for value in row:
+                lines.append("        <td>%s</td>" % Table_html._to_cell_html(value))
+            lines.append("    </tr>")
+        lines.append("</table>")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _to_cell_html(value):
+        text = escape(str(value)).replace("\n", "<br>")
+        if text.startswith("  "):
+            # make leading spaces visible in html
+            stripped = text.lstrip(" ")
+            text = "&nbsp;" * (len(text) - len(stripped)) + stripped
+        return text
@@ -0,0 +1,40 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import math
+from datetime import datetime, timedelta
+from Kqlmagic.chart_downsampler import Chart_downsampler
+
+xs = [datetime(2019, 1, 1) + timedelta(seconds=i) for i in range(10000)]
+ys = [math.sin(i / 100.0) for i in range(10000)]
+ys[1234] = 10.0
+
+def test_under_budget_not_downsampled():
+    (x, y, downsampled) = Chart_downsampler.downsample(xs[:100], ys[:100], 1000)
+    assert not downsampled
+    assert x == xs[:100] and y == ys[:100]
+
+def test_lttb():
+    (x, y, downsampled) = Chart_downsampler.downsample(xs, ys, 500, Chart_downsampler.LTTB)
+    assert downsampled
+    assert len(x) == len(y) == 500
+    assert x[0] == xs[0] and x[-1] == xs[-1]
+    assert x == sorted(x)
+    assert 10.0 in y
+
+def test_min_max():
+    (x, y, downsampled) = Chart_downsampler.downsample(xs, ys, 500, Chart_downsampler.MIN_MAX)
+    assert downsampled
+    assert len(x) <= 500
+    assert x == sorted(x)
+    assert 10.0 in y
+    assert min(y) == min(ys)
+
+def test_nulls_dropped():
+    y_with_nulls = [None if i % 2 else v for (i, v) in enumerate(ys)]
+    (x, y, downsampled) = Chart_downsampler.downsample(xs, y_with_nulls, 500)
+    assert downsampled
+    assert None not in y
@@ -0,0 +1,32 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import base64
+from datetime import datetime
+import numpy
+import plotly.graph_objs as go
+from Kqlmagic.chart_html import Chart_html
+
+def _decode(encoded):
+    return numpy.frombuffer(base64.b64decode(encoded["bdata"]), dtype="<f8").tolist()
+
+def test_encode_numeric_trace():
+    trace = Chart_html._encode_trace({"type": "scatter", "x": [1, 2, 3], "y": [0.5, None, 1.5]}, {})
+    assert _decode(trace["x"]) == [1.0, 2.0, 3.0]
+    y = _decode(trace["y"])
+    assert y[0] == 0.5 and numpy.isnan(y[1]) and y[2] == 1.5
+
+def test_encode_datetime_only_on_date_axis():
+    trace = {"type": "scatter", "x": [datetime(1970, 1, 1, 0, 0, 1), datetime(1970, 1, 1, 0, 0, 2, 500000)], "y": ["a", "b"]}
+    encoded = Chart_html._encode_trace(trace, {"xaxis": {"type": "date"}})
+    assert _decode(encoded["x"]) == [1000.0, 2500.0]
+    assert encoded["y"] == ["a", "b"]
+    assert Chart_html._encode_trace(trace, {})["x"] == trace["x"]
+
+def test_to_html_uses_cdn_by_default():
+    html = Chart_html.to_html(go.Figure(data=[go.Scatter(x=[1, 2], y=[3, 4])]))
+    assert Chart_html.PLOTLYJS_CDN_URL in html["head"]
+    assert '"bdata"' in html["body"]
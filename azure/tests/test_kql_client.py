@@ -0,0 +1,172 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+from datetime import timedelta
+import dateutil.parser
+import numpy
+from Kqlmagic.kql_client import KqlResponseTable, KqlResponse
+
+response_table = {
+    "Columns": [
+        {"ColumnName": "Timestamp", "ColumnType": "datetime"},
+        {"ColumnName": "Count", "ColumnType": "long"},
+        {"ColumnName": "Name", "ColumnType": "string"},
+        {"ColumnName": "Props", "ColumnType": "dynamic"},
+        {"ColumnName": "Duration", "ColumnType": "timespan"},
+        {"ColumnName": "Severity", "ColumnType": "int"},
+    ],
+    "Rows": [
+        ["2018-09-17T01:45:07.5325114Z", 1, "foo", '{"x": 1}', "1.02:03:04.5", None],
+        [None, 2, None, "[1, 2]", "-00:00:01", 3],
+    ],
+}
+
+def test_columnar_types():
+    columnar = KqlResponseTable(0, response_table).to_columnar()
+    assert str(columnar.get_column("Timestamp").dtype) == "datetime64[ns]"
+    assert str(columnar.get_column("Count").dtype) == "int64"
+    assert str(columnar.get_column("Duration").dtype) == "timedelta64[ns]"
+    assert str(columnar.get_column("Name").dtype) == "object"
+
+def test_columnar_rows_match_iterator():
+    table = KqlResponseTable(0, response_table)
+    columnar = table.to_columnar()
+    assert len(columnar) == 2
+    for row, columnar_row in zip(table, columnar):
+        assert [row[idx] for idx in range(table.columns_count)] == list(columnar_row)
+    assert columnar[0]["Duration"] == timedelta(days=1, hours=2, minutes=3, seconds=4.5)
+    assert columnar[0]["Severity"] is None
+    assert columnar[1][-1] == 3
+    assert columnar[1]["Props"] == [1, 2]
+    assert columnar[1][-table.columns_count] == columnar[1][0]
+    for key in (table.columns_count, -table.columns_count - 1):
+        try:
+            columnar[1][key]
+            assert False
+        except IndexError:
+            pass
+
+def test_columnar_nullable_ints_keep_precision():
+    table = KqlResponseTable(0, {
+        "Columns": [{"ColumnName": "Big", "ColumnType": "long"}, {"ColumnName": "Unsigned", "ColumnType": "ulong"}],
+        "Rows": [[2 ** 60 + 1, 2 ** 64 - 1], [None, None]],
+    })
+    columnar = table.to_columnar()
+    assert str(columnar.get_column("Big").dtype) == "int64"
+    assert str(columnar.get_column("Unsigned").dtype) == "uint64"
+    assert list(columnar[0]) == [2 ** 60 + 1, 2 ** 64 - 1]
+    assert list(columnar[1]) == [None, None]
+
+def test_result_converts_on_access():
+    row = next(iter(KqlResponseTable(0, response_table)))
+    assert row["Count"] == 1 and row["Name"] == "foo"
+    assert row._converted is None
+    props = row["Props"]
+    assert props == {"x": 1}
+    assert row["Props"] is props
+    assert row[1:3] == [1, "foo"]
+    assert row[1:3]["Name"] == "foo"
+
+def test_result_compares_to_non_sequence():
+    row = next(iter(KqlResponseTable(0, response_table)))
+    assert not (row == None)
+    assert row != None
+    assert row != 1
+
+def test_result_negative_index_out_of_range():
+    row = next(iter(KqlResponseTable(0, response_table)))
+    assert row[-len(row)] == row[0]
+    try:
+        row[-len(row) - 1]
+        assert False
+    except IndexError:
+        pass
+
+datetime_values = ["2018-09-17T01:45:07.5325114Z", "2018-09-17T01:45:07Z", "2018-09-17T01:45:07.5Z", None]
+
+def test_to_datetime_matches_dateutil():
+    for value in datetime_values[:-1]:
+        assert KqlResponseTable.to_datetime(value) == dateutil.parser.parse(value)
+    assert KqlResponseTable.to_datetime("2018-09-17 01:45:07+02:00") == dateutil.parser.parse("2018-09-17 01:45:07+02:00")
+
+def test_to_datetime_column():
+    column = KqlResponseTable.to_datetime_column(datetime_values)
+    assert str(column.dtype) == "datetime64[ns]"
+    assert str(column[0]) == "2018-09-17T01:45:07.532511400"
+    assert str(column[1]) == "2018-09-17T01:45:07.000000000"
+    assert numpy.isnat(column[3])
+    # odd values fall back to a per value conversion
+    column = KqlResponseTable.to_datetime_column(["2018-09-17 03:45:07+02:00"] + datetime_values)
+    assert str(column[0]) == "2018-09-17T01:45:07.000000000"
+    assert str(column[1]) == "2018-09-17T01:45:07.532511400"
+
+timespan_values = ["1.02:03:04.5", "-00:00:01", "00:00:00.0000001", "-10.00:00:00.1234567", None, 864000000000]
+
+def test_to_timedelta_column_matches_to_timedelta():
+    column = KqlResponseTable.to_timedelta_column(timespan_values)
+    assert str(column.dtype) == "timedelta64[ns]"
+    assert column[2] == numpy.timedelta64(100, "ns")
+    assert column[3] == -numpy.timedelta64(10 * 24 * 3600 * 10 ** 9 + 123456700, "ns")
+    assert numpy.isnat(column[4])
+    for idx in [0, 1, 5]:
+        assert column[idx].astype("timedelta64[us]").item() == KqlResponseTable.to_timedelta(timespan_values[idx])
+
+def test_timespan_out_of_timedelta64_range():
+    max_timespan = "10675199.02:48:05.4775807"
+    try:
+        KqlResponseTable.to_timedelta_column([max_timespan])
+        assert False
+    except OverflowError:
+        pass
+    table = KqlResponseTable(0, {"Columns": [{"ColumnName": "Duration", "ColumnType": "timespan"}], "Rows": [[max_timespan], ["-" + max_timespan]]})
+    columnar = table.to_columnar()
+    assert str(columnar.get_column("Duration").dtype) == "object"
+    assert columnar[0][0] == KqlResponseTable.to_timedelta(max_timespan)
+    assert columnar[1][0] == -KqlResponseTable.to_timedelta(max_timespan)
+
+def test_v2_response_frames_classification():
+    primary = dict(response_table, FrameType="DataTable", TableId=0, TableKind="PrimaryResult", TableName="PrimaryResult")
+    properties = {
+        "FrameType": "DataTable", "TableId": 1, "TableKind": "QueryProperties", "TableName": "@ExtendedProperties",
+        "Columns": [
+            {"ColumnName": "TableId", "ColumnType": "int"},
+            {"ColumnName": "Key", "ColumnType": "string"},
+            {"ColumnName": "Value", "ColumnType": "dynamic"},
+        ],
+        "Rows": [[0, "Visualization", '{"Visualization": "piechart"}']],
+    }
+    completion = {
+        "FrameType": "DataTable", "TableId": 2, "TableKind": "QueryCompletionInformation", "TableName": "QueryCompletionInformation",
+        "Columns": [
+            {"ColumnName": "EventTypeName", "ColumnType": "string"},
+            {"ColumnName": "Payload", "ColumnType": "string"},
+        ],
+        "Rows": [["QueryResourceConsumption", '{"ExecutionTime": 0.1}'], ["QueryInfo", '{"Count": 1}']],
+    }
+    frames = [{"FrameType": "DataSetHeader"}, primary, properties, completion, {"FrameType": "DataSetCompletion"}]
+    response = KqlResponse(frames, endpoint_version="v2")
+    assert len(response.all_tables) == 3
+    assert len(response.primary_results) == 1
+    assert response.visualization_results == {0: {"Visualization": "piechart"}}
+    assert response.completion_query_info_results == {"Count": 1}
+    assert response.completion_query_resource_consumption_results is response.completion_query_resource_consumption_results
+
+def test_dictionary_encode():
+    table = KqlResponseTable(0, {
+        "Columns": [{"ColumnName": "Region", "ColumnType": "string"}, {"ColumnName": "Name", "ColumnType": "string"}],
+        "Rows": [["west" + "us", "a"], ["east", "b"], ["".join(["west", "us"]), "c"], [None, "d"]],
+    })
+    table.dictionary_encode(2)
+    assert list(table.dictionaries) == [0]
+    values, codes = table.dictionaries[0]
+    assert values == ["westus", "east"]
+    assert codes.tolist() == [0, 1, 0, -1]
+    assert table.rows[0][0] is table.rows[2][0]
+
+def test_decode_rows_matches_iterator():
+    table = KqlResponseTable(0, response_table)
+    assert [idx for (idx, converter) in table.schema.converted_columns] == [0, 3, 4]
+    assert list(table.decode_rows()) == [list(row) for row in table]
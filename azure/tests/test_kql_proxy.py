@@ -0,0 +1,94 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import numpy
+from Kqlmagic.kql_client import KqlResponseTable
+from Kqlmagic.kql_proxy import KqlTableResponse, KqlRow
+
+response_table = {
+    "Columns": [
+        {"ColumnName": "Timestamp", "ColumnType": "datetime"},
+        {"ColumnName": "Count", "ColumnType": "long"},
+        {"ColumnName": "Name", "ColumnType": "string"},
+        {"ColumnName": "Props", "ColumnType": "dynamic"},
+        {"ColumnName": "Duration", "ColumnType": "timespan"},
+        {"ColumnName": "Severity", "ColumnType": "int"},
+    ],
+    "Rows": [
+        ["2018-09-17T01:45:07.5325114Z", 1, "foo", '{"x": 1}', "1.02:03:04.5", None],
+        [None, 2, None, "", "-00:00:01", 3],
+    ],
+}
+
+def test_to_dataframe_types():
+    frame = KqlTableResponse(KqlResponseTable(0, response_table), {}).to_dataframe()
+    assert list(frame.columns) == ["Timestamp", "Count", "Name", "Props", "Duration", "Severity"]
+    assert str(frame["Timestamp"].dtype) == "datetime64[ns]"
+    assert str(frame["Count"].dtype) == "int64"
+    assert str(frame["Duration"].dtype) == "timedelta64[ns]"
+    # int column with nulls is kept as float, nulls as NaN
+    assert str(frame["Severity"].dtype) == "float64"
+    assert frame["Props"][0] == {"x": 1}
+    assert frame["Props"][1] is None
+
+def test_to_dataframe_nullable_ints():
+    data_table = KqlResponseTable(0, {
+        "Columns": [{"ColumnName": "Small", "ColumnType": "long"}, {"ColumnName": "Big", "ColumnType": "long"}, {"ColumnName": "Unsigned", "ColumnType": "ulong"}],
+        "Rows": [[1, 2 ** 60 + 1, 2 ** 64 - 1], [None, None, None]],
+    })
+    frame = KqlTableResponse(data_table, {}).to_dataframe()
+    assert str(frame["Small"].dtype) == "float64"
+    # values beyond float64 precision are kept as python ints
+    assert frame["Big"].tolist() == [2 ** 60 + 1, None]
+    assert frame["Unsigned"].tolist() == [2 ** 64 - 1, None]
+
+def test_to_dataframe_not_shared_with_exports():
+    response = KqlTableResponse(KqlResponseTable(0, response_table), {})
+    response.to_arrow()
+    frame = response.to_dataframe()
+    assert not numpy.shares_memory(frame["Count"].values, response.data_table.to_columnar().get_column("Count"))
+    frame.iloc[0, 1] = 10
+    assert response.to_arrow().column("Count").to_pylist() == [1, 2]
+
+def test_to_arrow_types():
+    table = KqlTableResponse(KqlResponseTable(0, response_table), {}).to_arrow()
+    assert table.column_names == ["Timestamp", "Count", "Name", "Props", "Duration", "Severity"]
+    assert str(table.schema.field("Timestamp").type) == "timestamp[ns]"
+    assert str(table.schema.field("Duration").type) == "duration[ns]"
+    assert str(table.schema.field("Props").type) == "large_string"
+    assert table.column("Name").type.value_type == "string"
+    assert table.column("Severity").to_pylist() == [None, 3]
+
+def test_to_arrow_nullable_ints():
+    data_table = KqlResponseTable(0, {
+        "Columns": [{"ColumnName": "Big", "ColumnType": "long"}, {"ColumnName": "Unsigned", "ColumnType": "ulong"}],
+        "Rows": [[2 ** 60 + 1, 2 ** 64 - 1], [None, None]],
+    })
+    table = KqlTableResponse(data_table, {}).to_arrow()
+    assert str(table.schema.field("Big").type) == "int64"
+    assert str(table.schema.field("Unsigned").type) == "uint64"
+    assert table.column("Big").to_pylist() == [2 ** 60 + 1, None]
+    assert table.column("Unsigned").to_pylist() == [2 ** 64 - 1, None]
+
+def test_to_dataframe_dictionary_encoded():
+    data_table = KqlResponseTable(0, {
+        "Columns": [{"ColumnName": "Region", "ColumnType": "string"}],
+        "Rows": [["westus"], ["east"], ["westus"], [None]],
+    })
+    data_table.dictionary_encode(10)
+    frame = KqlTableResponse(data_table, {}).to_dataframe()
+    assert str(frame["Region"].dtype) == "category"
+    assert frame["Region"].tolist()[:3] == ["westus", "east", "westus"]
+    assert frame["Region"].isnull().tolist() == [False, False, False, True]
+    assert KqlTableResponse(data_table, {}).to_arrow().column("Region").to_pylist() == ["westus", "east", "westus", None]
+
+def test_row_styled_only_for_display():
+    row = KqlRow([1, {"x": 1}], 2)
+    assert type(row[1]) is dict
+    assert list(row) == [1, {"x": 1}]
+    styled = row.get_styled(1)
+    assert styled is not row[1] and styled == {"x": 1}
+    assert row.styled_values()[1] is styled
@@ -0,0 +1,314 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import os
+import copy
+import pickle
+import tempfile
+import numpy
+from Kqlmagic.kql_client import KqlResponse as KqlClientResponse
+from Kqlmagic.kql_proxy import KqlResponse
+from Kqlmagic.results import ResultSet
+from Kqlmagic.paged_table import Paged_table
+from Kqlmagic.cache_client import CacheClient
+
+columns = [
+    {"ColumnName": "Name", "ColumnType": "string"},
+    {"ColumnName": "Count", "ColumnType": "long"},
+    {"ColumnName": "Props", "ColumnType": "dynamic"},
+]
+rows = [["a", 1, '{"a": 1}'], ["b", 2, None], ["c", 3, "[1, 2]"]]
+
+def _query_result(rows=rows, columns=columns, options=None):
+    frames = [{
+        "FrameType": "DataTable", "TableId": 0, "TableKind": "PrimaryResult", "TableName": "PrimaryResult",
+        "Columns": columns, "Rows": [list(row) for row in rows],
+    }]
+    return KqlResponse(KqlClientResponse(frames, endpoint_version="v2"), **(options or {}))
+
+def _result_set(rows=rows, columns=columns, **options):
+    options = dict({"feedback": False}, **options)
+    return ResultSet(_query_result(rows, columns, options), "T", 0, {}, {}, options)
+
+def test_list_api():
+    rs = _result_set()
+    assert len(rs) == 3
+    assert rs[0] in rs and ["z", 0, None] not in rs
+    assert [row[0] for row in reversed(rs)] == ["c", "b", "a"]
+    assert rs.index(["b", 2, None]) == 1
+    assert rs.count(["b", 2, None]) == 1
+    assert len(rs * 2) == 6 and len(rs + []) == 3
+    assert rs.copy() == list(rs)
+    assert rs[-1][0] == "c" and [row[0] for row in rs[1:]] == ["b", "c"]
+    assert [] + rs == list(rs) and [["z", 0, None]] + rs == [["z", 0, None]] + list(rs)
+
+def test_copy_and_pickle():
+    rs = _result_set()
+    rs.index_by("Name")
+    for other in [copy.copy(rs), copy.deepcopy(rs), pickle.loads(pickle.dumps(rs))]:
+        assert type(other) is ResultSet and other is not rs
+        assert other == rs and len(other) == 3
+        assert other["b"][1] == 2 and other[2]["Props"] == [1, 2]
+        assert other.columns_name == rs.columns_name and other.pretty is not rs.pretty
+
+def test_rows_decoded_in_bulk():
+    rs = _result_set()
+    assert list(rs._decode_rows()) == [list(row) for row in rs]
+    assert rs.to_dict()["Props"] == ({"a": 1}, None, [1, 2])
+    assert list(_result_set(auto_limit=2)._decode_rows()) == [list(row) for row in rs[:2]]
+
+def test_integer_keys():
+    rs = _result_set()
+    assert rs[numpy.int64(1)][0] == "b"
+    assert rs["b"][1] == 2
+    try:
+        rs[3]
+        assert False
+    except IndexError:
+        pass
+
+def test_read_only():
+    rs = _result_set()
+    for mutate in [lambda: rs.append([]), lambda: rs.sort(), lambda: rs.pop(), rs.clear]:
+        try:
+            mutate()
+            assert False
+        except TypeError:
+            pass
+    assert len(rs) == 3
+
+def test_rows_memoized():
+    rs = _result_set()
+    assert rs[0] is rs[0]
+    rs[0][2]["a"] = 2
+    assert rs[0][2] == {"a": 2}
+
+def test_auto_limit_extra_record_dropped():
+    rs = _result_set(auto_limit=2)
+    assert rs.truncated
+    assert len(rs) == 2 and rs.records_count == 2
+    assert len(rs.to_dataframe()) == 2
+    assert rs.to_arrow().num_rows == 2
+    assert not _result_set(auto_limit=3).truncated
+    # a truncated response is not cached
+    assert _query_result(options={"auto_limit": 2}).truncated
+    assert not _query_result(options={"auto_limit": 3}).truncated
+
+def test_index_by():
+    rs = _result_set(rows + [["c", 4, None]])
+    index = rs.index_by("Count")
+    assert index[2][0] == "b" and 2 in index and 5 not in index
+    assert rs.index_by(1) is index
+    assert [row[1] for row in rs.index_by("Name").get_all("c")] == [3, 4]
+    try:
+        rs["c"]
+        assert False
+    except KeyError:
+        pass
+    try:
+        rs.index_by("Missing")
+        assert False
+    except KeyError:
+        pass
+    rs._update(_query_result([["d", 5, None]]))
+    assert rs.index_by("Count") is not index
+    assert rs["d"][1] == 5
+
+def test_getitem_unhashable_values():
+    rs = _result_set([['{"a": 1}', 1], ['[1]', 2]], [{"ColumnName": "Props", "ColumnType": "dynamic"}, {"ColumnName": "Count", "ColumnType": "long"}])
+    assert rs[{"a": 1}][1] == 1
+    try:
+        rs[{"b": 1}]
+        assert False
+    except KeyError:
+        pass
+
+def _two_tables_query_result(first_rows, second_rows):
+    frames = [
+        {"FrameType": "DataTable", "TableId": table_id, "TableKind": "PrimaryResult", "TableName": "PrimaryResult", "Columns": columns, "Rows": table_rows}
+        for (table_id, table_rows) in enumerate([first_rows, second_rows])
+    ]
+    return KqlResponse(KqlClientResponse(frames, endpoint_version="v2"))
+
+def test_fork_updated_on_access_after_refresh():
+    options = {"feedback": False}
+    rs = ResultSet(_two_tables_query_result(rows, rows[:1]), "T", 0, {}, {}, options)
+    fork = rs.fork_result(1)
+    assert len(fork) == 1 and len(fork.to_dataframe()) == 1
+    rs._update(_two_tables_query_result(rows, rows[:2]))
+    rs._update_fork_results()
+    assert len(fork) == 2
+    assert [row[0] for row in fork] == ["a", "b"]
+    assert len(fork.to_dataframe()) == 2
+    assert rs.fork_result(1) is fork
+
+def test_fork_result_table_id_forms():
+    options = {"feedback": False}
+    rs = ResultSet(_two_tables_query_result(rows, rows[:1]), "T", 0, {}, {}, options)
+    fork = rs.fork_result("1")
+    assert fork.fork_table_id == 1 and len(fork) == 1
+    assert rs.fork_result(numpy.int64(1)) is fork and rs.fork_result(1) is fork
+    assert rs.fork_result("0") is rs
+    for fork_table_id in [2, -1, "x"]:
+        try:
+            rs.fork_result(fork_table_id)
+            assert False
+        except KeyError:
+            pass
+
+def test_paged_table_get_page():
+    rs = _result_set(rows + [["d", None, None]])
+    html = Paged_table.get_html(rs, page_size=2)["body"]
+    table_id = html.split('id="')[1].split('"')[0]
+    page = Paged_table.get_page(table_id, page=1, page_size=2)
+    assert (page["page"], page["pages_count"], page["rows_count"]) == (1, 2, 4)
+    assert [row[0] for row in page["rows"]] == ["c", "d"]
+    # nulls first on ascending sort
+    page = Paged_table.get_page(table_id, page=0, page_size=2, sort_by=1)
+    assert [row[0] for row in page["rows"]] == ["d", "a"]
+    page = Paged_table.get_page(table_id, page=0, page_size=2, sort_by=1, ascending=False)
+    assert [row[0] for row in page["rows"]] == ["c", "b"]
+    page = Paged_table.get_page(table_id, page=5, page_size=2, filter="B")
+    assert (page["page"], page["rows_count"]) == (0, 1)
+    assert page["rows"][0][0] == "b"
+    assert "error" in Paged_table.get_page("missing")
+
+def test_to_csv_writes_raw_json():
+    csv_text = _result_set().to_csv()
+    assert csv_text.splitlines() == ["Name,Count,Props", 'a,1,"{""a"": 1}"', "b,2,", 'c,3,"[1, 2]"']
+
+def _read_parquet_result_set(file_path):
+    # cache client is created without an ipython shell, reading a file doesn't use its folder
+    frames = CacheClient.__new__(CacheClient)._read_parquet(file_path)
+    return ResultSet(KqlResponse(KqlClientResponse(frames, endpoint_version="v2")), "T", 0, {}, {}, {"feedback": False})
+
+def test_parquet_round_trip():
+    all_types_columns = columns + [
+        {"ColumnName": "Timestamp", "ColumnType": "datetime"},
+        {"ColumnName": "Duration", "ColumnType": "timespan"},
+        {"ColumnName": "Flag", "ColumnType": "bool"},
+        {"ColumnName": "Unsigned", "ColumnType": "ulong"},
+    ]
+    all_types_rows = [
+        row + extra
+        for (row, extra) in zip(rows, [
+            ["2018-09-17T01:45:07.5325114Z", "1.02:03:04.5", True, 2 ** 64 - 1],
+            [None, None, None, None],
+            ["2018-09-17T01:45:07Z", "-00:00:01", False, 0],
+        ])
+    ]
+    rs = _result_set(all_types_rows, all_types_columns)
+    file_path = os.path.join(tempfile.mkdtemp(), "result.parquet")
+    rs.to_parquet(file_path)
+    assert CacheClient.__new__(CacheClient)._read_parquet(file_path)[0]["Columns"] == all_types_columns
+    read_rs = _read_parquet_result_set(file_path)
+    assert read_rs.columns_type == rs.columns_type
+    assert [list(row) for row in read_rs] == [list(row) for row in rs]
+    # write options are passed on to pyarrow, unknown options are not ignored
+    rs.to_parquet(file_path, compression="gzip", row_group_size=1)
+    assert [list(row) for row in _read_parquet_result_set(file_path)] == [list(row) for row in rs]
+    try:
+        rs.to_parquet(file_path, compresion="gzip")
+        assert False
+    except TypeError:
+        pass
+
+time_columns = [{"ColumnName": "Timestamp", "ColumnType": "datetime"}, {"ColumnName": "Count", "ColumnType": "long"}]
+time_rows = [["2019-01-01T00:00:00Z", 1], ["2019-01-01T01:00:00Z", 5], [None, 0]]
+
+def _time_result_set(**options):
+    options = dict({"feedback": False}, **options)
+    rs = ResultSet(_query_result(time_rows, time_columns, options), "T | summarize count() by bin(Timestamp, 1h)\n| render timechart", 0, {}, {}, options)
+    rs._incremental_time_column = "Timestamp"
+    return rs
+
+def test_incremental_query():
+    query = _time_result_set()._get_incremental_query()
+    assert query == "T | summarize count() by bin(Timestamp, 1h)\n\n| where ['Timestamp'] >= datetime(2019-01-01T01:00:00Z)\n| render timechart"
+    # the max of a truncated result is not the max of the whole result
+    assert _time_result_set(auto_limit=2)._get_incremental_query() is None
+    rs = _time_result_set()
+    rs._incremental_time_column = "Count"
+    assert rs._get_incremental_query() is None
+
+def test_incremental_merge():
+    rs = _time_result_set()
+    rs._get_incremental_query()
+    tail = _query_result([["2019-01-01T01:00:00Z", 7], ["2019-01-01T02:00:00Z", 2]], time_columns)
+    assert rs._merge_incremental_result(tail)
+    assert [row[1] for row in rs] == [1, 0, 7, 2]
+    assert len(rs.to_dataframe()) == 4
+    # a tail with different columns doesn't match the result
+    rs._get_incremental_query()
+    assert not rs._merge_incremental_result(_query_result([["x", 1]], columns[:2]))
+    # a merged result above auto_limit is not merged
+    rs = _time_result_set(auto_limit=3)
+    rs._get_incremental_query()
+    assert not rs._merge_incremental_result(tail)
+    assert len(rs) == 3
+
+def _baseline_chart_sub_tables(rs, x_col_idx):
+    "the pivot before the sub tables were grouped by hash"
+    quantity_columns = [c for idx,c in enumerate(rs.columns) if idx != x_col_idx and c.is_quantity]
+    non_quantity_columns = [c for idx,c in enumerate(rs.columns) if idx != x_col_idx and not c.is_quantity]
+    rows = sorted(rs, key=lambda row: row[x_col_idx])
+    col_x = []
+    for row in rows:
+        if row[x_col_idx] not in col_x:
+            col_x.append(row[x_col_idx])
+    chart_sub_tables_dict = {}
+    for row in rows:
+        for qcol in quantity_columns:
+            if len(non_quantity_columns) > 0:
+                sub_table_name = ':'.join([row[col.idx] for col in non_quantity_columns]) + ':' + qcol.name
+            else:
+                sub_table_name = qcol.name
+            chart_sub_table = chart_sub_tables_dict.setdefault(sub_table_name, dict(zip(col_x, [None for i in range(len(col_x))])))
+            chart_sub_table[row[x_col_idx]] = row[qcol.idx]
+    return [(name, list(mapping.items())) for name, mapping in chart_sub_tables_dict.items()]
+
+def test_build_chart_sub_tables():
+    chart_columns = [
+        {"ColumnName": "Day", "ColumnType": "long"},
+        {"ColumnName": "Region", "ColumnType": "string"},
+        {"ColumnName": "Count", "ColumnType": "long"},
+        {"ColumnName": "Host", "ColumnType": "string"},
+        {"ColumnName": "Avg", "ColumnType": "real"},
+    ]
+    chart_rows = [
+        [3, "west", 1, "h1", 0.5],
+        [1, "east", 2, "h1", None],
+        [2, "west", 3, "h2", 1.5],
+        [1, "west", 4, "h1", 2.5],
+        [3, "east", 5, "h1", 3.5],
+        [2, "west", None, "h2", 4.5],
+    ]
+    rs = _result_set(chart_rows, chart_columns)
+    rs._build_chart_sub_tables(x_type='first')
+    built = [(t.name, list(t.items())) for t in rs.chart_sub_tables]
+    assert built == _baseline_chart_sub_tables(rs, 0)
+    assert [name for name, _ in built] == ["east:h1:Count", "east:h1:Avg", "west:h1:Count", "west:h1:Avg", "west:h2:Count", "west:h2:Avg"]
+    assert dict(built)["west:h2:Count"] == [(1, None), (2, None), (3, None)]
+    assert all(t.col_x.name == "Day" for t in rs.chart_sub_tables)
+    assert [t.col_y.name for t in rs.chart_sub_tables[:2]] == ["Count", "Avg"]
+
+def test_chart_cache():
+    rs = _result_set([[1, 10], [2, 20], [3, 15]], [{"ColumnName": "X", "ColumnType": "long"}, {"ColumnName": "Y", "ColumnType": "long"}])
+    rs.visualization = "linechart"
+    chart = rs._getChartHtml()
+    figure = rs.metadata["figure_or_data"]
+    assert chart and rs._getChartHtml() is chart
+    assert rs.metadata["figure_or_data"] is figure
+    # a chart option is part of the cache key
+    rs.options["palette_reverse"] = not rs.options.get("palette_reverse")
+    assert rs._getChartHtml() is not chart
+    assert len(rs._chart_cache) == 2
+    # an updated result is charted again
+    rs._update(_query_result([[1, 5], [2, 6]], [{"ColumnName": "X", "ColumnType": "long"}, {"ColumnName": "Y", "ColumnType": "long"}]))
+    assert rs._chart_cache == {}
+    rs.visualization = "linechart"
+    assert rs._getChartHtml() is not chart
+    assert rs.metadata["figure_or_data"] is not figure
@@ -34,6 +34,7 @@ INSTALL_REQUIRES    = [
                         'prettytable>=0.7.2',
                         'matplotlib>=3.0.0',
                         'pandas>=0.23.4',
+                        'numpy>=1.15.0',
                         'azure-kusto-data>=0.0.15',
                         'azure-kusto-ingest>=0.0.15',
                         'adal>=1.1.0',
@@ -47,6 +48,10 @@ INSTALL_REQUIRES    = [
                         'setuptools>=40.4.3',
 ]
 
+EXTRAS_REQUIRE      = {
+                        'arrow': ['pyarrow>=0.11.0'],
+}
+
 
 # To use a consistent encoding
 import codecs
@@ -114,4 +119,5 @@ setup(name=NAME,
     include_package_data=True,
     zip_safe=False,
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
 )